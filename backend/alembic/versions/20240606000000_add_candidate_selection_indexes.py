@@ -0,0 +1,37 @@
+"""add indexes for playlist candidate selection
+
+Revision ID: 20240606000000
+Revises: 20240605000000
+Create Date: 2024-06-06 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20240606000000"
+down_revision = "20240605000000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tracks_popularity_desc",
+        "tracks",
+        [sa.text("popularity DESC")],
+        postgresql_where=sa.text("popularity IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_recent_tracks_user_track",
+        "recent_tracks",
+        ["user_id", "track_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recent_tracks_user_track", table_name="recent_tracks")
+    op.drop_index("ix_tracks_popularity_desc", table_name="tracks")
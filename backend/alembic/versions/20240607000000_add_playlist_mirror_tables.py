@@ -0,0 +1,49 @@
+"""add playlist mirror tables
+
+Revision ID: 20240607000000
+Revises: 20240606000000
+Create Date: 2024-06-07 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20240607000000"
+down_revision = "20240606000000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "playlists",
+        sa.Column("id", sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(length=512), nullable=True),
+        sa.Column("snapshot_id", sa.String(length=128), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    op.create_table(
+        "playlist_tracks",
+        sa.Column("playlist_id", sa.String(length=64), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("track_id", sa.String(length=64), nullable=True),
+        sa.Column("name", sa.String(length=512), nullable=True),
+        sa.Column("artists", postgresql.ARRAY(sa.String(length=512)), nullable=True),
+        sa.Column("album", sa.String(length=512), nullable=True),
+        sa.Column("uri", sa.Text(), nullable=True),
+        sa.Column("popularity", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["playlist_id"], ["playlists.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("playlist_id", "position"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("playlist_tracks")
+    op.drop_table("playlists")
@@ -0,0 +1,34 @@
+"""add payload_policy to recent_tracks
+
+Revision ID: 20240608000000
+Revises: 20240607000000
+Create Date: 2024-06-08 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20240608000000"
+down_revision = "20240607000000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL and are picked up once by the compaction job.
+    op.add_column("recent_tracks", sa.Column("payload_policy", sa.String(length=64), nullable=True))
+    op.create_index(
+        "ix_recent_tracks_payload_policy",
+        "recent_tracks",
+        ["payload_policy"],
+        postgresql_where=sa.text("raw_payload IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recent_tracks_payload_policy", table_name="recent_tracks")
+    op.drop_column("recent_tracks", "payload_policy")
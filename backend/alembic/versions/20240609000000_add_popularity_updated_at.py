@@ -0,0 +1,41 @@
+"""add popularity_updated_at to tracks and artists
+
+Revision ID: 20240609000000
+Revises: 20240608000000
+Create Date: 2024-06-09 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20240609000000"
+down_revision = "20240608000000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("tracks", "artists"):
+        op.add_column(table, sa.Column("popularity_updated_at", sa.DateTime(timezone=True), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET popularity_updated_at = updated_at WHERE popularity IS NOT NULL"
+        )
+        op.create_index(
+            f"ix_{table}_popularity_updated_at",
+            table,
+            ["popularity_updated_at"],
+            postgresql_where=sa.text("popularity_updated_at IS NOT NULL"),
+        )
+    # Lets the refresh scheduler probe whether a track sits in an active playlist.
+    op.create_index("ix_playlist_tracks_track_id", "playlist_tracks", ["track_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_playlist_tracks_track_id", table_name="playlist_tracks")
+    for table in ("artists", "tracks"):
+        op.drop_index(f"ix_{table}_popularity_updated_at", table_name=table)
+        op.drop_column(table, "popularity_updated_at")
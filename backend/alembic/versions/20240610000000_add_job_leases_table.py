@@ -0,0 +1,31 @@
+"""add job_leases table
+
+Revision ID: 20240610000000
+Revises: 20240609000000
+Create Date: 2024-06-10 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20240610000000"
+down_revision = "20240609000000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_leases",
+        sa.Column("name", sa.String(length=255), primary_key=True, nullable=False),
+        sa.Column("last_started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_leases")
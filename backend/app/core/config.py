@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
 from pathlib import Path
 
@@ -26,6 +26,43 @@ class Settings(BaseSettings):
     spotify_redirect_uri: AnyHttpUrl = Field(alias="SPOTIFY_REDIRECT_URI")
     database_url: str = Field(alias="DATABASE_URL")
     cors_origins_raw: str | List[AnyHttpUrl] | None = Field(default=None, alias="CORS_ORIGINS")
+    spotify_http_timeout: float = Field(default=15.0, alias="SPOTIFY_HTTP_TIMEOUT")
+    spotify_http_connect_timeout: float = Field(default=5.0, alias="SPOTIFY_HTTP_CONNECT_TIMEOUT")
+    spotify_http_max_connections: int = Field(default=100, alias="SPOTIFY_HTTP_MAX_CONNECTIONS")
+    spotify_http_max_keepalive: int = Field(default=20, alias="SPOTIFY_HTTP_MAX_KEEPALIVE")
+    spotify_http_keepalive_expiry: float = Field(default=30.0, alias="SPOTIFY_HTTP_KEEPALIVE_EXPIRY")
+    spotify_http2: bool = Field(default=False, alias="SPOTIFY_HTTP2")
+    spotify_app_token_refresh_leeway: int = Field(default=300, alias="SPOTIFY_APP_TOKEN_REFRESH_LEEWAY")
+    spotify_rate_limit_rps: float = Field(default=10.0, alias="SPOTIFY_RATE_LIMIT_RPS")
+    spotify_rate_limit_burst: float = Field(default=10.0, alias="SPOTIFY_RATE_LIMIT_BURST")
+    spotify_max_retries: int = Field(default=3, alias="SPOTIFY_MAX_RETRIES")
+    spotify_retry_backoff: float = Field(default=0.5, alias="SPOTIFY_RETRY_BACKOFF")
+    spotify_retry_max_delay: float = Field(default=30.0, alias="SPOTIFY_RETRY_MAX_DELAY")
+    token_refresh_window_minutes: int = Field(default=15, alias="TOKEN_REFRESH_WINDOW_MINUTES")
+    token_refresh_concurrency: int = Field(default=5, alias="TOKEN_REFRESH_CONCURRENCY")
+    recent_tracks_payload_mode: Literal["full", "strip", "compact", "none"] = Field(
+        default="strip", alias="RECENT_TRACKS_PAYLOAD_MODE"
+    )
+    recent_tracks_payload_drop_keys_raw: str = Field(
+        default="available_markets,images", alias="RECENT_TRACKS_PAYLOAD_DROP_KEYS"
+    )
+    playlist_fetch_concurrency: int = Field(default=5, alias="PLAYLIST_FETCH_CONCURRENCY")
+    recent_tracks_concurrency: int = Field(default=8, alias="RECENT_TRACKS_CONCURRENCY")
+    new_releases_concurrency: int = Field(default=5, alias="NEW_RELEASES_CONCURRENCY")
+    new_releases_incremental: bool = Field(default=True, alias="NEW_RELEASES_INCREMENTAL")
+    new_releases_known_pages_stop: int = Field(default=2, alias="NEW_RELEASES_KNOWN_PAGES_STOP")
+    new_releases_full_sweep_hours: float = Field(default=6.0, alias="NEW_RELEASES_FULL_SWEEP_HOURS")
+    popularity_drain_concurrency: int = Field(default=4, alias="POPULARITY_DRAIN_CONCURRENCY")
+    popularity_drain_seconds: float = Field(default=300.0, alias="POPULARITY_DRAIN_SECONDS")
+    popularity_refresh_daily_requests: int = Field(default=2000, alias="POPULARITY_REFRESH_DAILY_REQUESTS")
+    popularity_hot_refresh_hours: float = Field(default=24.0, alias="POPULARITY_HOT_REFRESH_HOURS")
+    popularity_tail_refresh_days: float = Field(default=30.0, alias="POPULARITY_TAIL_REFRESH_DAYS")
+    popularity_new_release_days: int = Field(default=30, alias="POPULARITY_NEW_RELEASE_DAYS")
+    ingestion_pipeline_enabled: bool = Field(default=True, alias="INGESTION_PIPELINE_ENABLED")
+    ingestion_queue_size: int = Field(default=5000, alias="INGESTION_QUEUE_SIZE")
+    ingestion_batch_wait_seconds: float = Field(default=2.0, alias="INGESTION_BATCH_WAIT_SECONDS")
+    release_details_concurrency: int = Field(default=8, alias="RELEASE_DETAILS_CONCURRENCY")
+    release_details_commit_batch: int = Field(default=50, alias="RELEASE_DETAILS_COMMIT_BATCH")
 
     @property
     def cors_origins(self) -> List[str]:
@@ -36,6 +73,10 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in value.split(",") if origin.strip()]
         return [str(url) for url in value]
 
+    @property
+    def recent_tracks_payload_drop_keys(self) -> List[str]:
+        return [key.strip() for key in self.recent_tracks_payload_drop_keys_raw.split(",") if key.strip()]
+
     @property
     def spotify_scopes(self) -> List[str]:
         return [
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app.core.config import get_settings
+
+
+class TokenBucket:
+    """Async token bucket shared by every caller of the Spotify Web API.
+
+    ``pause`` lets a 429 response hold back all callers until Spotify's
+    ``Retry-After`` window has elapsed, not just the request that hit it.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            await self._wait_for_pause()
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def _wait_for_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiter: TokenBucket | None = None
+
+
+def get_rate_limiter() -> TokenBucket:
+    global _limiter
+    if _limiter is None:
+        settings = get_settings()
+        _limiter = TokenBucket(settings.spotify_rate_limit_rps, settings.spotify_rate_limit_burst)
+    return _limiter
@@ -11,7 +11,21 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.router import api_router
 from app.core.config import get_settings
+from app.core.http import close_http_client, init_http_client
 from app.tasks import (
+    ARTIST_DETAILS_SYNC_INTERVAL_MINUTES,
+    NEW_RELEASES_SYNC_INTERVAL_MINUTES,
+    POPULARITY_REFRESH_INTERVAL_MINUTES,
+    RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES,
+    RECENT_TRACKS_SYNC_INTERVAL_MINUTES,
+    RELEASE_DETAILS_SYNC_INTERVAL_MINUTES,
+    TOKEN_REFRESH_INTERVAL_MINUTES,
+    TRACK_DETAILS_SYNC_INTERVAL_MINUTES,
+    compact_recent_track_payloads,
+    refresh_expiring_tokens,
+    refresh_stale_popularity,
+    start_ingestion_pipeline,
+    stop_ingestion_pipeline,
     sync_new_releases,
     sync_recent_release_details,
     sync_recent_tracks_for_all_users,
@@ -37,43 +51,66 @@ scheduler = AsyncIOScheduler()
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    await init_http_client()
+    # Queues hand work straight to the next stage; the interval jobs below remain as a safety net.
+    start_ingestion_pipeline()
     if not scheduler.running:
         scheduler.add_job(
             sync_recent_tracks_for_all_users,
-            trigger=IntervalTrigger(minutes=5),
+            trigger=IntervalTrigger(minutes=RECENT_TRACKS_SYNC_INTERVAL_MINUTES),
             id="sync_recent_tracks",
             replace_existing=True,
         )
         scheduler.add_job(
             sync_new_releases,
-            trigger=IntervalTrigger(minutes=15),
+            trigger=IntervalTrigger(minutes=NEW_RELEASES_SYNC_INTERVAL_MINUTES),
             id="sync_new_releases",
             replace_existing=True,
         )
         scheduler.add_job(
             sync_recent_release_details,
-            trigger=IntervalTrigger(minutes=10),
+            trigger=IntervalTrigger(minutes=RELEASE_DETAILS_SYNC_INTERVAL_MINUTES),
             id="sync_recent_release_details",
             replace_existing=True,
         )
         scheduler.add_job(
             sync_track_details,
-            trigger=IntervalTrigger(minutes=6),
+            trigger=IntervalTrigger(minutes=TRACK_DETAILS_SYNC_INTERVAL_MINUTES),
             id="sync_track_details",
             replace_existing=True,
         )
         scheduler.add_job(
             sync_artist_details,
-            trigger=IntervalTrigger(minutes=12),
+            trigger=IntervalTrigger(minutes=ARTIST_DETAILS_SYNC_INTERVAL_MINUTES),
             id="sync_artist_details",
             replace_existing=True,
         )
+        scheduler.add_job(
+            refresh_expiring_tokens,
+            trigger=IntervalTrigger(minutes=TOKEN_REFRESH_INTERVAL_MINUTES),
+            id="refresh_expiring_tokens",
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            compact_recent_track_payloads,
+            trigger=IntervalTrigger(minutes=RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES),
+            id="compact_recent_track_payloads",
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            refresh_stale_popularity,
+            trigger=IntervalTrigger(minutes=POPULARITY_REFRESH_INTERVAL_MINUTES),
+            id="refresh_stale_popularity",
+            replace_existing=True,
+        )
         scheduler.start()
     try:
         yield
     finally:
         if scheduler.running:
             scheduler.shutdown(wait=False)
+        await stop_ingestion_pipeline()
+        await close_http_client()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
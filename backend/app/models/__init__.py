@@ -1,5 +1,8 @@
 from app.models.recent_track import RecentTrack
 from app.models.artist import Artist
+from app.models.job_lease import JobLease
+from app.models.playlist import Playlist
+from app.models.playlist_track import PlaylistTrack
 from app.models.release import Release
 from app.models.release_track import ReleaseTrack
 from app.models.track import Track
@@ -9,6 +12,9 @@ from app.models.user import User
 
 __all__ = [
     "Artist",
+    "JobLease",
+    "Playlist",
+    "PlaylistTrack",
     "Release",
     "ReleaseTrack",
     "RecentTrack",
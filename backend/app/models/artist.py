@@ -15,6 +15,7 @@ class Artist(Base):
     name: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
     type: Mapped[str | None] = mapped_column(String(length=64), nullable=True)
     popularity: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    popularity_updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     followers: Mapped[int | None] = mapped_column(Integer, nullable=True)
     genres: Mapped[list[str] | None] = mapped_column(ARRAY(String(length=128)), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
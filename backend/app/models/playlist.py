@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class Playlist(Base):
+    # One row per Spotify playlist, shared by every user who opens it: without a market parameter
+    # Spotify returns the same items to every reader, so snapshot_id identifies the content for all
+    # of them. Access is still checked per user by the snapshot request made with their own token.
+    __tablename__ = "playlists"
+
+    id: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    name: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
+    snapshot_id: Mapped[str] = mapped_column(String(length=128), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), onupdate=func.now(), server_default=func.now()
+    )
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from sqlalchemy import ARRAY, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PlaylistTrack(Base):
+    __tablename__ = "playlist_tracks"
+
+    playlist_id: Mapped[str] = mapped_column(
+        String(length=64), ForeignKey("playlists.id", ondelete="CASCADE"), primary_key=True
+    )
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    track_id: Mapped[str | None] = mapped_column(String(length=64), nullable=True)
+    name: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
+    artists: Mapped[list[str] | None] = mapped_column(ARRAY(String(length=512)), nullable=True)
+    album: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
+    # spotify:local: URIs embed URL-encoded artist/album/title and are not length-bounded.
+    uri: Mapped[str | None] = mapped_column(Text, nullable=True)
+    popularity: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -27,6 +27,7 @@ class RecentTrack(Base):
     artist_names: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
     album_name: Mapped[str | None] = mapped_column(String(length=512), nullable=True)
     raw_payload: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    payload_policy: Mapped[str | None] = mapped_column(String(length=64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now(), server_default=func.now()
     )
@@ -17,6 +17,7 @@ class Track(Base):
     track_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
     type: Mapped[str | None] = mapped_column(String(length=64), nullable=True)
     popularity: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    popularity_updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.now(), server_default=func.now()
     )
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 import logging
 from typing import Any
 from urllib.parse import parse_qs, urlparse
@@ -9,11 +11,15 @@ from urllib.parse import parse_qs, urlparse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.models import Release
 from app.services.spotify import SpotifyService
 
 logger = logging.getLogger(__name__)
 
+# When the last full tag:new sweep finished in this process; incremental runs are only trusted after one.
+_last_full_sweep_at: datetime | None = None
+
 
 @dataclass(slots=True)
 class _ParsedRelease:
@@ -30,16 +36,108 @@ class NewReleasesSyncService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.spotify = SpotifyService(session)
-
-    async def sync(self, *, limit: int = 50, max_offset: int = 1000) -> int:
-        albums = await self._fetch_new_releases(limit=limit, max_offset=max_offset)
+        # Ids inserted by this service, for callers that forward them to detail fetching.
+        self.created_ids: list[str] = []
+
+    async def sync(
+        self,
+        *,
+        limit: int = 50,
+        max_offset: int = 1000,
+        concurrency: int | None = None,
+        incremental: bool | None = None,
+    ) -> int:
+        global _last_full_sweep_at
+
+        settings = get_settings()
+        use_incremental = settings.new_releases_incremental if incremental is None else incremental
+        if use_incremental and not self._full_sweep_due():
+            return await self._sync_incremental(limit=limit, max_offset=max_offset)
+
+        albums = await self._fetch_new_releases(limit=limit, max_offset=max_offset, concurrency=concurrency)
         parsed = self._parse_albums(albums)
-        return await self._persist(parsed)
+        created = await self._persist(parsed)
+        _last_full_sweep_at = datetime.now(timezone.utc)
+        return created
+
+    async def _sync_incremental(self, *, limit: int, max_offset: int) -> int:
+        """Persist page by page and stop once enough consecutive pages hold only known releases."""
+        stop_after = max(1, get_settings().new_releases_known_pages_stop)
+        created = 0
+        known_streak = 0
+        async for items in self._iter_pages(offset=0, limit=limit, max_offset=max_offset):
+            page_created = await self._persist(self._parse_albums(items))
+            created += page_created
+            known_streak = known_streak + 1 if page_created == 0 else 0
+            if known_streak >= stop_after:
+                logger.info("Stopping new releases sync after %d fully known pages", known_streak)
+                break
+        return created
 
-    async def _fetch_new_releases(self, *, limit: int, max_offset: int) -> list[dict[str, Any]]:
-        offset = 0
-        request_limit = limit
+    @staticmethod
+    def _full_sweep_due() -> bool:
+        if _last_full_sweep_at is None:
+            return True
+        interval = timedelta(hours=get_settings().new_releases_full_sweep_hours)
+        return datetime.now(timezone.utc) - _last_full_sweep_at >= interval
+
+    async def _fetch_new_releases(
+        self,
+        *,
+        limit: int,
+        max_offset: int,
+        concurrency: int | None = None,
+    ) -> list[dict[str, Any]]:
+        workers = concurrency if concurrency is not None else get_settings().new_releases_concurrency
+        if workers <= 1:
+            return await self._fetch_pages_sequentially(offset=0, limit=limit, max_offset=max_offset)
+
+        logger.info("Fetching new releases page 1 (offset=0, limit=%d)", limit)
+        payload = await self.spotify.search_new_releases(limit=limit, offset=0)
+        album_payload = payload.get("albums") or {}
+        albums = list(album_payload.get("items") or [])
+        if not albums:
+            return albums
+
+        total = self._parse_int(album_payload.get("total"))
+        page_limit = album_payload.get("limit") or limit
+        if total is None:
+            # Without a total the page count is unknown, so keep following next links.
+            next_offset, next_limit = self._parse_next_page(
+                album_payload.get("next"),
+                fallback_offset=page_limit,
+                fallback_limit=limit,
+            )
+            if not album_payload.get("next") or next_offset <= 0:
+                return albums
+            albums.extend(await self._fetch_pages_sequentially(offset=next_offset, limit=next_limit, max_offset=max_offset))
+            return albums
+
+        offsets = list(range(page_limit, min(total, max_offset), page_limit))
+        if not offsets:
+            return albums
+
+        semaphore = asyncio.Semaphore(workers)
+
+        async def fetch(offset: int) -> list[dict[str, Any]]:
+            async with semaphore:
+                logger.info("Fetching new releases page at offset=%d (limit=%d)", offset, page_limit)
+                page = await self.spotify.search_new_releases(limit=page_limit, offset=offset)
+                return (page.get("albums") or {}).get("items") or []
+
+        # gather preserves argument order, so pages are merged in offset order.
+        for items in await asyncio.gather(*(fetch(offset) for offset in offsets)):
+            albums.extend(items)
+        return albums
+
+    async def _fetch_pages_sequentially(self, *, offset: int, limit: int, max_offset: int) -> list[dict[str, Any]]:
         albums: list[dict[str, Any]] = []
+        async for items in self._iter_pages(offset=offset, limit=limit, max_offset=max_offset):
+            albums.extend(items)
+        return albums
+
+    async def _iter_pages(self, *, offset: int, limit: int, max_offset: int) -> AsyncIterator[list[dict[str, Any]]]:
+        request_limit = limit
         page = 0
         while offset < max_offset:
             page += 1
@@ -50,7 +148,7 @@ class NewReleasesSyncService:
             if not items:
                 break
 
-            albums.extend(items)
+            yield items
 
             next_offset, next_limit = self._parse_next_page(
                 album_payload.get("next"),
@@ -63,7 +161,6 @@ class NewReleasesSyncService:
                 break
             offset = next_offset
             request_limit = next_limit
-        return albums
 
     def _parse_albums(self, albums: list[dict[str, Any]]) -> list[_ParsedRelease]:
         parsed: dict[str, _ParsedRelease] = {}
@@ -108,6 +205,7 @@ class NewReleasesSyncService:
 
         self.session.add_all(new_records)
         await self.session.commit()
+        self.created_ids.extend(record.id for record in new_records)
         return len(new_records)
 
     @staticmethod
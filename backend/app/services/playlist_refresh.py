@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 import logging
 import re
 from typing import Any
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import String, all_, any_, bindparam, delete, exists, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import RecentTrack, Track, User
+from app.core.config import get_settings
+from app.models import (
+    Artist,
+    Playlist,
+    PlaylistTrack,
+    RecentTrack,
+    Release,
+    ReleaseTrack,
+    Track,
+    TrackArtist,
+    User,
+)
 from app.services.recent_tracks import RecentTracksSyncService
 from app.services.spotify import SpotifyService
 
@@ -19,6 +32,11 @@ PLAYLIST_ID_RE = re.compile(
     r"(?:spotify:playlist:|https?://open\.spotify\.com/playlist/)?(?P<id>[A-Za-z0-9]+)"
 )
 
+# Spotify field projections limited to what _PlaylistTrack and _build_response read.
+PLAYLIST_ITEM_FIELDS = "items(track(id,name,uri,popularity,artists(name),album(name)))"
+PLAYLIST_PAGE_FIELDS = f"total,limit,offset,next,{PLAYLIST_ITEM_FIELDS}"
+PLAYLIST_FIELDS = f"name,snapshot_id,tracks({PLAYLIST_PAGE_FIELDS})"
+
 
 @dataclass(slots=True)
 class _PlaylistTrack:
@@ -46,14 +64,15 @@ class PlaylistRefreshService:
         playlist_id = self._parse_playlist_id(playlist_url)
 
         # Refresh recent listening from Spotify, then rely on stored data
-        await RecentTracksSyncService(self.session).sync(user)
-        listened_ids = await self._get_listened_track_ids(user)
+        await RecentTracksSyncService(self.session).sync_new_plays(user)
+        playlist, tracks = await self._fetch_playlist_with_tracks(playlist_id, user)
+
+        # Only the listened tracks that are in the playlist matter here; the rest of the history stays in SQL.
+        listened_ids = await self._get_listened_track_ids(user, {track.track_id for track in tracks if track.track_id})
         logger.info(
-            f"Starting playlist refresh - playlist_id={playlist_id}, listened_count={len(listened_ids)}, target_size={target_size}"
+            f"Starting playlist refresh - playlist_id={playlist_id}, listened_in_playlist={len(listened_ids)}, target_size={target_size}"
         )
 
-        playlist, tracks = await self._fetch_playlist_with_tracks(playlist_id, user)
-
         to_remove = [
             track.uri for track in tracks if track.track_id and track.track_id in listened_ids and track.uri
         ]
@@ -70,15 +89,19 @@ class PlaylistRefreshService:
             f"Computed tracks to remove - playlist_id={playlist_id}, current_track_count={len(tracks)}, to_remove_count={len(to_remove)}"
         )
         removed = 0
+        # snapshot_id returned by our last mutation; None means we have not changed the playlist.
+        expected_snapshot: str | None = None
         if to_remove:
-            await self.spotify.remove_tracks_from_playlist(playlist_id, to_remove, user)
+            result = await self.spotify.remove_tracks_from_playlist(playlist_id, to_remove, user)
+            expected_snapshot = result.get("snapshot_id")
             removed = len(to_remove)
             logger.info(
                 f"Removed listened tracks from playlist - playlist_id={playlist_id}, removed={removed}"
             )
+            # Spotify removes every occurrence of each URI, so mirror that locally instead of re-fetching.
+            removed_uris = set(to_remove)
+            tracks = [track for track in tracks if track.uri not in removed_uris]
 
-        # Re-fetch after removals
-        playlist, tracks = await self._fetch_playlist_with_tracks(playlist_id, user)
         current_ids = {track.track_id for track in tracks if track.track_id}
 
         needed = max(0, target_size - len(current_ids))
@@ -87,23 +110,97 @@ class PlaylistRefreshService:
             f"Post-removal playlist state - playlist_id={playlist_id}, current_track_count={len(current_ids)}, needed={needed}, target_size={target_size}"
         )
         if needed:
-            candidates = await self._get_candidate_tracks(exclude_ids=current_ids | listened_ids, limit=needed)
+            candidates = await self._get_candidate_tracks(user, exclude_ids=current_ids, limit=needed)
             if candidates:
                 uris = [f"spotify:track:{track_id}" for track_id in candidates]
-                await self.spotify.add_tracks_to_playlist(playlist_id, uris, user)
+                result = await self.spotify.add_tracks_to_playlist(
+                    playlist_id, uris, user, snapshot_id=expected_snapshot or playlist.get("snapshot_id")
+                )
+                expected_snapshot = result.get("snapshot_id")
                 added = len(uris)
                 logger.info(
                     f"Added candidate tracks to playlist - playlist_id={playlist_id}, added={added}, candidate_pool={len(candidates)}"
                 )
-                playlist, tracks = await self._fetch_playlist_with_tracks(playlist_id, user)
+                # Added tracks are appended to the end of the playlist.
+                tracks = tracks + await self._load_stored_tracks(candidates)
+
+        if expected_snapshot is not None:
+            # Only a full re-fetch can recover from edits made by someone else while we were mutating.
+            current = await self.spotify.get_playlist(playlist_id, user, fields="snapshot_id")
+            if current.get("snapshot_id") != expected_snapshot:
+                logger.info(f"Playlist changed concurrently, re-fetching - playlist_id={playlist_id}")
+                playlist, tracks = await self._download_playlist(playlist_id, user)
+            else:
+                playlist = {**playlist, "snapshot_id": expected_snapshot}
+                await self._store_mirror(playlist_id, playlist, tracks)
 
         return self._build_response(playlist_id, playlist, tracks, removed=removed, added=added)
 
     async def _fetch_playlist_with_tracks(self, playlist_id: str, user: User) -> tuple[dict[str, Any], list[_PlaylistTrack]]:
-        playlist = await self.spotify.get_playlist(playlist_id, user)
+        """Serve the stored mirror while Spotify's snapshot_id still matches it, otherwise re-page."""
+        current = await self.spotify.get_playlist(playlist_id, user, fields="name,snapshot_id")
+        mirror = await self.session.get(Playlist, playlist_id, populate_existing=True)
+        if mirror is not None and mirror.snapshot_id == current.get("snapshot_id"):
+            return current, await self._load_mirror_tracks(playlist_id)
+        return await self._download_playlist(playlist_id, user)
+
+    async def _download_playlist(self, playlist_id: str, user: User) -> tuple[dict[str, Any], list[_PlaylistTrack]]:
+        playlist = await self.spotify.get_playlist(playlist_id, user, fields=PLAYLIST_FIELDS)
         tracks = await self._collect_playlist_tracks(playlist_id, user, playlist.get("tracks") or {})
+        await self._store_mirror(playlist_id, playlist, tracks)
         return playlist, tracks
 
+    async def _load_mirror_tracks(self, playlist_id: str) -> list[_PlaylistTrack]:
+        stmt = select(PlaylistTrack).where(PlaylistTrack.playlist_id == playlist_id).order_by(PlaylistTrack.position)
+        result = await self.session.execute(stmt)
+        return [
+            _PlaylistTrack(
+                track_id=row.track_id,
+                name=row.name,
+                artists=list(row.artists or []),
+                album=row.album,
+                uri=row.uri,
+                popularity=row.popularity,
+            )
+            for row in result.scalars().all()
+        ]
+
+    async def _store_mirror(self, playlist_id: str, playlist: dict[str, Any], tracks: list[_PlaylistTrack]) -> None:
+        snapshot_id = playlist.get("snapshot_id")
+        if not snapshot_id:
+            return
+
+        # The upsert locks the playlist row, so concurrent writers replace the track rows one at a time.
+        stmt = insert(Playlist).values(id=playlist_id, name=playlist.get("name"), snapshot_id=snapshot_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Playlist.id],
+            set_={
+                "name": stmt.excluded.name,
+                "snapshot_id": stmt.excluded.snapshot_id,
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
+        await self.session.execute(delete(PlaylistTrack).where(PlaylistTrack.playlist_id == playlist_id))
+        if tracks:
+            await self.session.execute(
+                insert(PlaylistTrack),
+                [
+                    {
+                        "playlist_id": playlist_id,
+                        "position": position,
+                        "track_id": track.track_id,
+                        "name": track.name,
+                        "artists": track.artists,
+                        "album": track.album,
+                        "uri": track.uri,
+                        "popularity": track.popularity,
+                    }
+                    for position, track in enumerate(tracks)
+                ],
+            )
+        await self.session.commit()
+
     async def _collect_playlist_tracks(
         self,
         playlist_id: str,
@@ -114,11 +211,30 @@ class PlaylistRefreshService:
         next_url = initial_payload.get("next")
         offset = initial_payload.get("offset") or 0
         limit = initial_payload.get("limit") or len(items) or 100
+        total = self._parse_int(initial_payload.get("total"))
+
+        if next_url and total is not None:
+            # The total is known from the first page, so the rest can be requested concurrently.
+            semaphore = asyncio.Semaphore(max(1, get_settings().playlist_fetch_concurrency))
+
+            async def fetch(page_offset: int) -> list[dict[str, Any]]:
+                async with semaphore:
+                    page = await self.spotify.get_playlist_tracks(
+                        playlist_id, user, limit=limit, offset=page_offset, fields=PLAYLIST_PAGE_FIELDS
+                    )
+                    return page.get("items") or []
+
+            offsets = range(offset + limit, total, limit)
+            for page_items in await asyncio.gather(*(fetch(page_offset) for page_offset in offsets)):
+                items.extend(page_items)
+            next_url = None
 
         while next_url:
             # Spotify playlist next url always includes offset/limit
             offset += limit
-            page = await self.spotify.get_playlist_tracks(playlist_id, user, limit=limit, offset=offset)
+            page = await self.spotify.get_playlist_tracks(
+                playlist_id, user, limit=limit, offset=offset, fields=PLAYLIST_PAGE_FIELDS
+            )
             items.extend(page.get("items") or [])
             limit = page.get("limit") or limit
             next_url = page.get("next")
@@ -138,15 +254,64 @@ class PlaylistRefreshService:
             )
         return parsed
 
-    async def _get_listened_track_ids(self, user: User) -> set[str]:
-        stmt = select(RecentTrack.track_id).where(RecentTrack.user_id == user.id)
+    async def _load_stored_tracks(self, track_ids: list[str]) -> list[_PlaylistTrack]:
+        """Build playlist entries for tracks we just added from the catalog we already store."""
+        tracks_result = await self.session.execute(
+            select(Track.id, Track.name, Track.popularity).where(Track.id.in_(track_ids))
+        )
+        rows = {row.id: row for row in tracks_result.all()}
+
+        artists_result = await self.session.execute(
+            select(TrackArtist.track_id, Artist.name)
+            .join(Artist, Artist.id == TrackArtist.artist_id)
+            .where(TrackArtist.track_id.in_(track_ids))
+        )
+        artists: dict[str, list[str]] = {}
+        for track_id, artist_name in artists_result.all():
+            if artist_name:
+                artists.setdefault(track_id, []).append(artist_name)
+
+        albums_result = await self.session.execute(
+            select(ReleaseTrack.track_id, Release.name)
+            .join(Release, Release.id == ReleaseTrack.release_id)
+            .where(ReleaseTrack.track_id.in_(track_ids))
+        )
+        albums = {track_id: album_name for track_id, album_name in albums_result.all()}
+
+        return [
+            _PlaylistTrack(
+                track_id=track_id,
+                name=rows[track_id].name if track_id in rows else None,
+                artists=artists.get(track_id, []),
+                album=albums.get(track_id),
+                uri=f"spotify:track:{track_id}",
+                popularity=rows[track_id].popularity if track_id in rows else None,
+            )
+            for track_id in track_ids
+        ]
+
+    async def _get_listened_track_ids(self, user: User, track_ids: set[str]) -> set[str]:
+        if not track_ids:
+            return set()
+        stmt = (
+            select(RecentTrack.track_id)
+            .where(RecentTrack.user_id == user.id)
+            .where(RecentTrack.track_id == any_(bindparam("track_ids", list(track_ids), type_=ARRAY(String))))
+            .distinct()
+        )
         result = await self.session.execute(stmt)
         return set(result.scalars().all())
 
-    async def _get_candidate_tracks(self, *, exclude_ids: set[str], limit: int) -> list[str]:
-        stmt = select(Track.id).where(Track.popularity.is_not(None))
+    async def _get_candidate_tracks(self, user: User, *, exclude_ids: set[str], limit: int) -> list[str]:
+        # Anti-join against the user's history so it never has to leave Postgres.
+        listened = (
+            select(RecentTrack.id)
+            .where(RecentTrack.user_id == user.id)
+            .where(RecentTrack.track_id == Track.id)
+        )
+        stmt = select(Track.id).where(Track.popularity.is_not(None)).where(~exists(listened))
         if exclude_ids:
-            stmt = stmt.where(~Track.id.in_(exclude_ids))
+            stmt = stmt.where(Track.id != all_(bindparam("exclude_ids", list(exclude_ids), type_=ARRAY(String))))
         stmt = stmt.order_by(Track.popularity.desc()).limit(limit * 3)  # grab extras in case some are missing
         result = await self.session.execute(stmt)
         ids = [row for row in result.scalars().all()]
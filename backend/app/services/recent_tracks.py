@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+import hashlib
 from typing import Any
+import uuid
 
-from sqlalchemy import select
+from sqlalchemy import func, null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.models import RecentTrack, User
 from app.services.spotify import SpotifyService
 
@@ -18,12 +22,16 @@ class _ParsedTrack:
     track_name: str | None
     artist_names: str | None
     album_name: str | None
-    raw_payload: dict[str, Any]
+    raw_payload: dict[str, Any] | None
 
 
 class RecentTracksSyncService:
     """Fetch and persist recently played tracks for reuse in different entry points."""
 
+    PAGE_LIMIT = 50
+    # Guards against a cursor that never advances; 10 pages is far more than five minutes of listening.
+    MAX_CURSOR_PAGES = 10
+
     def __init__(self, session: AsyncSession):
         self.session = session
         self.spotify = SpotifyService(session)
@@ -33,7 +41,31 @@ class RecentTracksSyncService:
         await self._persist_tracks(user, payload.get("items") or [])
         return payload
 
-    async def _persist_tracks(self, user: User, items: list[dict[str, Any]]) -> None:
+    async def sync_new_plays(self, user: User) -> int:
+        """Page forward from the newest stored play and persist only plays after it."""
+        cursor = await self._get_played_at_cursor(user)
+        inserted = 0
+        for _ in range(self.MAX_CURSOR_PAGES):
+            payload = await self.spotify.get_recent_tracks(user, limit=self.PAGE_LIMIT, after=cursor)
+            items = payload.get("items") or []
+            inserted += await self._persist_tracks(user, items)
+
+            next_cursor = self._parse_int((payload.get("cursors") or {}).get("after"))
+            # Without a stored cursor Spotify only exposes the latest page, so there is nothing to page towards.
+            if cursor is None or len(items) < self.PAGE_LIMIT or next_cursor is None or next_cursor <= cursor:
+                break
+            cursor = next_cursor
+        return inserted
+
+    async def _get_played_at_cursor(self, user: User) -> int | None:
+        stmt = select(func.max(RecentTrack.played_at)).where(RecentTrack.user_id == user.id)
+        result = await self.session.execute(stmt)
+        latest = result.scalar_one_or_none()
+        if latest is None:
+            return None
+        return int(latest.timestamp() * 1000)
+
+    async def _persist_tracks(self, user: User, items: list[dict[str, Any]]) -> int:
         parsed_tracks = []
         for item in items:
             track = item.get("track") or {}
@@ -55,41 +87,141 @@ class RecentTracksSyncService:
                     track_name=track.get("name"),
                     artist_names=artist_names or None,
                     album_name=album.get("name"),
-                    raw_payload=item,
+                    raw_payload=self._prepare_payload(item),
                 )
             )
 
         if not parsed_tracks:
-            return
+            return 0
 
-        played_at_values = [track.played_at for track in parsed_tracks]
+        payload_policy = self._payload_policy()
+        # ON CONFLICT makes the insert idempotent against a concurrent sync for the same user.
         stmt = (
-            select(RecentTrack.played_at)
-            .where(RecentTrack.user_id == user.id)
-            .where(RecentTrack.played_at.in_(played_at_values))
+            insert(RecentTrack)
+            .values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "user_id": user.id,
+                        "track_id": track.track_id,
+                        "played_at": track.played_at,
+                        "track_name": track.track_name,
+                        "artist_names": track.artist_names,
+                        "album_name": track.album_name,
+                        # null() stores SQL NULL rather than a JSON 'null' document.
+                        "raw_payload": track.raw_payload if track.raw_payload is not None else null(),
+                        "payload_policy": payload_policy,
+                    }
+                    for track in parsed_tracks
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "played_at"])
+            .returning(RecentTrack.id)
         )
         result = await self.session.execute(stmt)
-        existing_played_at = set(result.scalars().all())
-
-        new_records = [
-            RecentTrack(
-                user_id=user.id,
-                track_id=track.track_id,
-                played_at=track.played_at,
-                track_name=track.track_name,
-                artist_names=track.artist_names,
-                album_name=track.album_name,
-                raw_payload=track.raw_payload,
+        inserted = len(result.all())
+        await self.session.commit()
+        return inserted
+
+    async def compact_stored_payloads(self, *, batch_size: int = 500, max_batches: int = 20) -> int:
+        """Rewrite stored raw payloads under the current payload policy, one committed batch at a time."""
+        if get_settings().recent_tracks_payload_mode == "full":
+            return 0  # Dropped keys cannot be restored.
+        policy = self._payload_policy()
+        compacted = 0
+        for _ in range(max_batches):
+            # Rewritten rows carry the current policy and drop out of this filter, so no cursor is needed.
+            # The range form (instead of !=) lets Postgres answer it from ix_recent_tracks_payload_policy
+            # without touching the heap or TOAST once everything is compacted.
+            stmt = (
+                select(RecentTrack.id, RecentTrack.raw_payload)
+                .where(RecentTrack.raw_payload.is_not(None))
+                .where(
+                    or_(
+                        RecentTrack.payload_policy.is_(None),
+                        RecentTrack.payload_policy < policy,
+                        RecentTrack.payload_policy > policy,
+                    )
+                )
+                .limit(batch_size)
             )
-            for track in parsed_tracks
-            if track.played_at not in existing_played_at
-        ]
+            rows = (await self.session.execute(stmt)).all()
+            if not rows:
+                break
+
+            updates = [
+                {"id": row.id, "raw_payload": self._prepare_payload(row.raw_payload), "payload_policy": policy}
+                for row in rows
+            ]
+            kept = [row for row in updates if row["raw_payload"] is not None]
+            dropped = [row["id"] for row in updates if row["raw_payload"] is None]
+            if kept:
+                await self.session.execute(update(RecentTrack), kept)
+            if dropped:
+                # null() stores SQL NULL, matching the insert path; a bulk update would write JSON 'null'.
+                await self.session.execute(
+                    update(RecentTrack)
+                    .where(RecentTrack.id.in_(dropped))
+                    .values(raw_payload=null(), payload_policy=policy)
+                )
+            await self.session.commit()
+            compacted += len(updates)
+        return compacted
 
-        if not new_records:
-            return
+    @staticmethod
+    def _payload_policy() -> str:
+        """Short tag for the current payload policy, stored next to each payload it produced."""
+        settings = get_settings()
+        mode = settings.recent_tracks_payload_mode
+        if mode == "strip":
+            keys = ",".join(sorted(set(settings.recent_tracks_payload_drop_keys)))
+            return f"strip:{hashlib.sha1(keys.encode()).hexdigest()[:12]}"
+        return mode
+
+    @classmethod
+    def _prepare_payload(cls, item: dict[str, Any] | None) -> dict[str, Any] | None:
+        settings = get_settings()
+        mode = settings.recent_tracks_payload_mode
+        if item is None or mode == "none":
+            return None
+        if mode == "compact":
+            return cls._compact_payload(item)
+        if mode == "strip":
+            return cls._strip_keys(item, frozenset(settings.recent_tracks_payload_drop_keys))
+        return item
+
+    @classmethod
+    def _strip_keys(cls, value: Any, drop_keys: frozenset[str]) -> Any:
+        if isinstance(value, dict):
+            return {key: cls._strip_keys(item, drop_keys) for key, item in value.items() if key not in drop_keys}
+        if isinstance(value, list):
+            return [cls._strip_keys(item, drop_keys) for item in value]
+        return value
 
-        self.session.add_all(new_records)
-        await self.session.commit()
+    @staticmethod
+    def _compact_payload(item: dict[str, Any]) -> dict[str, Any]:
+        track = item.get("track") or {}
+        album = track.get("album") or {}
+        context = item.get("context") or {}
+        return {
+            "played_at": item.get("played_at"),
+            "context": {"type": context.get("type"), "uri": context.get("uri")} if context else None,
+            "track": {
+                "id": track.get("id"),
+                "name": track.get("name"),
+                "uri": track.get("uri"),
+                "duration_ms": track.get("duration_ms"),
+                "popularity": track.get("popularity"),
+                "artists": [
+                    {"id": artist.get("id"), "name": artist.get("name")} for artist in track.get("artists") or []
+                ],
+                "album": {
+                    "id": album.get("id"),
+                    "name": album.get("name"),
+                    "release_date": album.get("release_date"),
+                },
+            },
+        }
 
     @staticmethod
     def _parse_played_at(value: str | None) -> datetime | None:
@@ -100,3 +232,10 @@ class RecentTracksSyncService:
             return datetime.fromisoformat(normalized)
         except ValueError:  # pragma: no cover - defensive guard for malformed payloads
             return None
+
+    @staticmethod
+    def _parse_int(value: Any) -> int | None:
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import logging
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
-from sqlalchemy import exists, select
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.models import Artist, Release, ReleaseTrack, Track, TrackArtist
 from app.services.spotify import SpotifyService
 
@@ -38,43 +41,115 @@ class _ParsedArtist:
 class ReleaseDetailsSyncService:
     """Fetch album details (tracks and artists) for recent releases missing metadata."""
 
+    # Spotify's /albums endpoint accepts at most 20 ids per request.
+    ALBUMS_BATCH_SIZE = 20
+
     def __init__(self, session: AsyncSession):
         self.session = session
         self.spotify = SpotifyService(session)
+        # Ids seen in persisted albums, for callers that forward them to popularity fetching.
+        self.discovered_track_ids: set[str] = set()
+        self.discovered_artist_ids: set[str] = set()
+
+    async def sync_recent_releases(self, *, days: int = 30, concurrency: int | None = None) -> int:
+        release_ids = await self._get_releases_needing_details(days=days)
+        return await self._sync_releases(release_ids, concurrency=concurrency)
 
-    async def sync_recent_releases(self, *, days: int = 30) -> int:
-        release_ids = await self._get_releases_needing_details(days)
+    async def sync_releases(self, release_ids: list[str], *, concurrency: int | None = None) -> int:
+        """Fetch details for the given releases, skipping any that already have tracks."""
+        pending = await self._get_releases_needing_details(release_ids=release_ids)
+        return await self._sync_releases(pending, concurrency=concurrency)
+
+    async def _sync_releases(self, release_ids: list[str], *, concurrency: int | None) -> int:
         if not release_ids:
             return 0
 
-        processed = 0
-        for release_id in release_ids:
-            try:
-                album = await self._fetch_full_album(release_id)
-            except Exception as exc:  # pragma: no cover - background logging only
-                logger.warning("Failed to fetch album %s details: %s", release_id, exc)
-                continue
+        workers = concurrency if concurrency is not None else get_settings().release_details_concurrency
+        semaphore = asyncio.Semaphore(max(1, workers))
 
-            if not album:
-                continue
+        async def fetch(batch: list[str]) -> list[dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._fetch_full_albums(batch)
+                except Exception as exc:  # pragma: no cover - background logging only
+                    logger.warning("Failed to fetch details for albums %s: %s", ", ".join(batch), exc)
+                    return []
 
-            await self._persist_album(album)
-            processed += 1
+        batches = [
+            release_ids[start : start + self.ALBUMS_BATCH_SIZE]
+            for start in range(0, len(release_ids), self.ALBUMS_BATCH_SIZE)
+        ]
+        # Fetches run concurrently; persistence stays sequential because the session is not concurrency-safe.
+        tasks = [asyncio.create_task(fetch(batch)) for batch in batches]
+        commit_every = max(1, get_settings().release_details_commit_batch)
+        processed = 0
+        uncommitted = 0
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                for album in await next_batch:
+                    if not album:
+                        continue
+
+                    # A savepoint per album lets one bad payload roll back alone instead of the whole batch.
+                    try:
+                        async with self.session.begin_nested():
+                            await self._persist_album(album)
+                    except Exception as exc:  # pragma: no cover - background logging only
+                        logger.warning("Failed to persist album %s details: %s", album.get("id"), exc)
+                        continue
+
+                    processed += 1
+                    uncommitted += 1
+                    if uncommitted >= commit_every:
+                        await self.session.commit()
+                        uncommitted = 0
+
+            if uncommitted:
+                await self.session.commit()
+        finally:
+            for task in tasks:
+                task.cancel()
 
         return processed
 
-    async def _get_releases_needing_details(self, days: int) -> list[str]:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        stmt = (
-            select(Release.id)
-            .where(Release.created_at >= cutoff)
-            .where(~exists().where(ReleaseTrack.release_id == Release.id))
-        )
+    async def _get_releases_needing_details(
+        self,
+        *,
+        days: int | None = None,
+        release_ids: list[str] | None = None,
+    ) -> list[str]:
+        stmt = select(Release.id).where(~exists().where(ReleaseTrack.release_id == Release.id))
+        if days is not None:
+            stmt = stmt.where(Release.created_at >= datetime.now(timezone.utc) - timedelta(days=days))
+        if release_ids is not None:
+            if not release_ids:
+                return []
+            stmt = stmt.where(Release.id.in_(release_ids))
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def _fetch_full_album(self, release_id: str) -> dict[str, Any]:
-        album = await self.spotify.get_album(release_id)
+    async def _fetch_full_albums(self, release_ids: list[str]) -> list[dict[str, Any]]:
+        payload = await self.spotify.get_albums(release_ids)
+        # Unknown ids come back as null entries.
+        albums = [album for album in payload.get("albums") or [] if album and album.get("id")]
+        # Only albums whose embedded track page has a next link issue extra requests here.
+        results = await asyncio.gather(
+            *(self._fetch_full_album(album["id"], album) for album in albums),
+            return_exceptions=True,
+        )
+
+        full_albums = []
+        for album, result in zip(albums, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to fetch album %s tracks: %s", album["id"], result)
+                continue
+            full_albums.append(result)
+        return full_albums
+
+    async def _fetch_full_album(self, release_id: str, album: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Complete an album's track listing, fetching the album first when no payload is given."""
+        if album is None:
+            album = await self.spotify.get_album(release_id)
         if not album:
             return {}
 
@@ -83,6 +158,21 @@ class ReleaseDetailsSyncService:
         next_url = tracks_payload.get("next")
         current_offset = tracks_payload.get("offset") or 0
         current_limit = tracks_payload.get("limit") or len(items) or 50
+        total = self._parse_int(tracks_payload.get("total"))
+
+        if next_url and total is not None:
+            # The total is known up front, so the remaining pages can be requested in parallel.
+            page_limit = max(1, min(current_limit, 50))
+            offsets = list(range(current_offset + len(items), total, page_limit))
+            pages = await asyncio.gather(
+                *(self.spotify.get_album_tracks(release_id, limit=page_limit, offset=offset) for offset in offsets)
+            )
+            for page in pages:
+                items.extend(page.get("items") or [])
+            if offsets:
+                current_offset = offsets[-1]
+                current_limit = page_limit
+            next_url = None
 
         while next_url:
             next_offset, next_limit = self._parse_next_page(
@@ -134,119 +224,91 @@ class ReleaseDetailsSyncService:
         await self._upsert_release_tracks(release_id, parsed_tracks)
         await self._upsert_track_artists(parsed_tracks)
 
-        await self.session.commit()
+        self.discovered_track_ids.update(track.id for track in parsed_tracks)
+        self.discovered_artist_ids.update(artist.id for artist in parsed_artists)
 
     async def _upsert_tracks(self, parsed_tracks: list[_ParsedTrack]) -> None:
         if not parsed_tracks:
             return
 
-        track_ids = [track.id for track in parsed_tracks]
-        stmt = select(Track).where(Track.id.in_(track_ids))
-        result = await self.session.execute(stmt)
-        existing_tracks = {track.id: track for track in result.scalars().all()}
-
-        new_tracks: list[Track] = []
-        for track in parsed_tracks:
-            existing = existing_tracks.get(track.id)
-            if existing:
-                existing.name = track.name or existing.name
-                existing.duration_ms = track.duration_ms if track.duration_ms is not None else existing.duration_ms
-                existing.track_number = track.track_number if track.track_number is not None else existing.track_number
-                existing.type = track.type or existing.type
-            else:
-                new_tracks.append(
-                    Track(
-                        id=track.id,
-                        name=track.name,
-                        duration_ms=track.duration_ms,
-                        track_number=track.track_number,
-                        type=track.type,
-                    )
-                )
-
-        if new_tracks:
-            self.session.add_all(new_tracks)
+        # Dedupe and sort so one statement never touches a row twice and concurrent writers lock in the same order.
+        rows = {
+            track.id: {
+                "id": track.id,
+                "name": track.name,
+                "duration_ms": track.duration_ms,
+                "track_number": track.track_number,
+                "type": track.type,
+            }
+            for track in parsed_tracks
+        }
+        stmt = insert(Track).values([rows[track_id] for track_id in sorted(rows)])
+        excluded = stmt.excluded
+        # Incoming NULLs (and empty strings) never overwrite stored values.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Track.id],
+            set_={
+                "name": func.coalesce(func.nullif(excluded.name, ""), Track.name),
+                "duration_ms": func.coalesce(excluded.duration_ms, Track.duration_ms),
+                "track_number": func.coalesce(excluded.track_number, Track.track_number),
+                "type": func.coalesce(func.nullif(excluded.type, ""), Track.type),
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
 
     async def _upsert_artists(self, parsed_artists: list[_ParsedArtist]) -> None:
         if not parsed_artists:
             return
 
-        artist_ids = [artist.id for artist in parsed_artists]
-        stmt = select(Artist).where(Artist.id.in_(artist_ids))
-        result = await self.session.execute(stmt)
-        existing_artists = {artist.id: artist for artist in result.scalars().all()}
-
-        new_artists: list[Artist] = []
-        for artist in parsed_artists:
-            existing = existing_artists.get(artist.id)
-            if existing:
-                existing.name = artist.name or existing.name
-                existing.type = artist.type or existing.type
-                existing.popularity = artist.popularity if artist.popularity is not None else existing.popularity
-                existing.followers = artist.followers if artist.followers is not None else existing.followers
-                existing.genres = artist.genres or existing.genres
-            else:
-                new_artists.append(
-                    Artist(
-                        id=artist.id,
-                        name=artist.name,
-                        type=artist.type,
-                        popularity=artist.popularity,
-                        followers=artist.followers,
-                        genres=artist.genres or None,
-                    )
-                )
-
-        if new_artists:
-            self.session.add_all(new_artists)
+        rows = {
+            artist.id: {
+                "id": artist.id,
+                "name": artist.name,
+                "type": artist.type,
+                "popularity": artist.popularity,
+                "followers": artist.followers,
+                "genres": artist.genres or None,
+            }
+            for artist in parsed_artists
+        }
+        stmt = insert(Artist).values([rows[artist_id] for artist_id in sorted(rows)])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Artist.id],
+            set_={
+                "name": func.coalesce(func.nullif(excluded.name, ""), Artist.name),
+                "type": func.coalesce(func.nullif(excluded.type, ""), Artist.type),
+                "popularity": func.coalesce(excluded.popularity, Artist.popularity),
+                "followers": func.coalesce(excluded.followers, Artist.followers),
+                "genres": func.coalesce(excluded.genres, Artist.genres),
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
 
     async def _upsert_release_tracks(self, release_id: str, parsed_tracks: list[_ParsedTrack]) -> None:
         if not parsed_tracks:
             return
 
-        track_ids = [track.id for track in parsed_tracks]
-        stmt = (
-            select(ReleaseTrack.track_id)
-            .where(ReleaseTrack.release_id == release_id)
-            .where(ReleaseTrack.track_id.in_(track_ids))
+        track_ids = sorted({track.id for track in parsed_tracks})
+        stmt = insert(ReleaseTrack).values(
+            [{"release_id": release_id, "track_id": track_id} for track_id in track_ids]
         )
-        result = await self.session.execute(stmt)
-        existing = set(result.scalars().all())
-
-        new_links = [
-            ReleaseTrack(release_id=release_id, track_id=track_id)
-            for track_id in track_ids
-            if track_id not in existing
-        ]
-        if new_links:
-            self.session.add_all(new_links)
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["release_id", "track_id"]))
 
     async def _upsert_track_artists(self, parsed_tracks: list[_ParsedTrack]) -> None:
         if not parsed_tracks:
             return
 
-        pairs = {(track.id, artist_id) for track in parsed_tracks for artist_id in track.artist_ids}
+        pairs = sorted({(track.id, artist_id) for track in parsed_tracks for artist_id in track.artist_ids})
         if not pairs:
             return
 
-        track_ids = list({track_id for track_id, _ in pairs})
-        artist_ids = list({artist_id for _, artist_id in pairs})
-
-        stmt = (
-            select(TrackArtist.track_id, TrackArtist.artist_id)
-            .where(TrackArtist.track_id.in_(track_ids))
-            .where(TrackArtist.artist_id.in_(artist_ids))
+        stmt = insert(TrackArtist).values(
+            [{"track_id": track_id, "artist_id": artist_id} for track_id, artist_id in pairs]
         )
-        result = await self.session.execute(stmt)
-        existing_pairs = {(row[0], row[1]) for row in result.all()}
-
-        new_links = [
-            TrackArtist(track_id=track_id, artist_id=artist_id)
-            for track_id, artist_id in pairs
-            if (track_id, artist_id) not in existing_pairs
-        ]
-        if new_links:
-            self.session.add_all(new_links)
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["track_id", "artist_id"]))
 
     def _parse_tracks(self, items: list[dict[str, Any]]) -> list[_ParsedTrack]:
         parsed = []
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import random
 import secrets
 from datetime import datetime, timedelta, timezone
 import uuid
@@ -7,23 +11,91 @@ from typing import Any, Mapping
 
 import httpx
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.core.rate_limit import get_rate_limiter
 from app.models import Token, User
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _AppTokenCache:
+    """Client-credentials token shared by every SpotifyService in the process."""
+
+    access_token: str | None = None
+    expires_at: datetime | None = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def get(self, *, leeway: timedelta) -> str | None:
+        if self.access_token and self.expires_at and self.expires_at > datetime.now(timezone.utc) + leeway:
+            return self.access_token
+        return None
+
+    def store(self, access_token: str, expires_in: int) -> None:
+        self.access_token = access_token
+        self.expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+
+    def clear(self, access_token: str) -> None:
+        # Only drop the token the caller saw rejected, not one another caller has since fetched.
+        if self.access_token == access_token:
+            self.access_token = None
+            self.expires_at = None
+
+
+_app_token_cache = _AppTokenCache()
+
+
+class _UserTokenCache:
+    """Access tokens by user id so user-scoped calls skip the token SELECT until near expiry."""
+
+    def __init__(self) -> None:
+        self._entries: dict[uuid.UUID, tuple[str, datetime]] = {}
+        self._locks: dict[uuid.UUID, asyncio.Lock] = {}
+
+    def get(self, user_id: uuid.UUID, *, leeway: timedelta) -> str | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        access_token, expires_at = entry
+        if expires_at <= datetime.now(timezone.utc) + leeway:
+            self._entries.pop(user_id, None)
+            return None
+        return access_token
+
+    def store(self, token: Token) -> None:
+        self._entries[token.user_id] = (token.access_token, token.expires_at)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def lock(self, user_id: uuid.UUID) -> asyncio.Lock:
+        return self._locks.setdefault(user_id, asyncio.Lock())
+
+
+_user_token_cache = _UserTokenCache()
+
+
+def invalidate_user_token(user_id: uuid.UUID) -> None:
+    _user_token_cache.invalidate(user_id)
+
 
 class SpotifyService:
     API_BASE_URL = "https://api.spotify.com/v1"
     TOKEN_URL = "https://accounts.spotify.com/api/token"
     AUTHORIZE_URL = "https://accounts.spotify.com/authorize"
+    # Methods that are safe to replay after a 5xx or transport error; 429s are always retried.
+    IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+    # Spotify caps playlist add/remove requests at 100 items.
+    PLAYLIST_MUTATION_LIMIT = 100
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, client: httpx.AsyncClient | None = None):
         self.session = session
         self.settings = get_settings()
-        self._app_token: str | None = None
-        self._app_token_expires_at: datetime | None = None
+        self.client = client or get_http_client()
 
     async def exchange_code_for_tokens(self, code: str) -> dict[str, Any]:
         data = {
@@ -85,40 +157,63 @@ class SpotifyService:
 
         await self.session.commit()
         await self.session.refresh(token)
+        _user_token_cache.invalidate(user.id)
         return token
 
-    async def get_recent_tracks(self, user: User) -> dict[str, Any]:
+    async def get_recent_tracks(self, user: User, *, limit: int = 20, after: int | None = None) -> dict[str, Any]:
         access_token = await self._ensure_access_token(user)
+        params: dict[str, Any] = {"limit": max(1, min(limit, 50))}
+        if after is not None:
+            params["after"] = after
         return await self._api_request(
             "GET",
             "/me/player/recently-played",
             access_token,
-            params={"limit": 20},
+            params=params,
         )
 
-    async def add_tracks_to_playlist(self, playlist_id: str, uris: list[str], user: User) -> dict[str, Any]:
-        access_token = await self._ensure_access_token(user)
-        payload = {"uris": uris}
-        return await self._api_request(
-            "POST",
-            f"/playlists/{playlist_id}/tracks",
-            access_token,
-            json=payload,
-        )
+    async def add_tracks_to_playlist(
+        self, playlist_id: str, uris: list[str], user: User, *, snapshot_id: str | None = None
+    ) -> dict[str, Any]:
+        """Append ``uris`` in order, splitting them into requests of at most 100 items.
+
+        ``snapshot_id`` is the playlist version the caller last saw; it lets a failed append tell
+        whether it was applied. Without it the current snapshot is fetched first.
+        """
+        result: dict[str, Any] = {}
+        chunks = self._chunk(uris, self.PLAYLIST_MUTATION_LIMIT)
+        if chunks and snapshot_id is None:
+            snapshot_id = (await self.get_playlist(playlist_id, user, fields="snapshot_id")).get("snapshot_id")
+        for chunk in chunks:
+            result = await self._add_playlist_chunk(playlist_id, chunk, user, snapshot_id=snapshot_id)
+            snapshot_id = result.get("snapshot_id") or snapshot_id
+        return result
 
     async def remove_tracks_from_playlist(self, playlist_id: str, uris: list[str], user: User) -> dict[str, Any]:
-        access_token = await self._ensure_access_token(user)
-        payload = {"tracks": [{"uri": uri} for uri in uris]}
-        return await self._api_request(
-            "DELETE",
-            f"/playlists/{playlist_id}/tracks",
-            access_token,
-            json=payload,
-        )
+        """Remove every occurrence of ``uris``, chaining snapshot_id across 100-item requests."""
+        result: dict[str, Any] = {}
+        snapshot_id: str | None = None
+        # Spotify removes all occurrences of a URI, so duplicates would only waste chunk slots.
+        unique_uris = list(dict.fromkeys(uris))
+        for chunk in self._chunk(unique_uris, self.PLAYLIST_MUTATION_LIMIT):
+            access_token = await self._ensure_access_token(user)
+            payload: dict[str, Any] = {"tracks": [{"uri": uri} for uri in chunk]}
+            if snapshot_id:
+                payload["snapshot_id"] = snapshot_id
+            # DELETE by URI is idempotent, so _api_request may safely replay it on 5xx.
+            result = await self._api_request(
+                "DELETE",
+                f"/playlists/{playlist_id}/tracks",
+                access_token,
+                json=payload,
+            )
+            snapshot_id = result.get("snapshot_id") or snapshot_id
+        return result
 
-    async def get_playlist(self, playlist_id: str, user: User) -> dict[str, Any]:
+    async def get_playlist(self, playlist_id: str, user: User, *, fields: str | None = None) -> dict[str, Any]:
         access_token = await self._ensure_access_token(user)
-        return await self._api_request("GET", f"/playlists/{playlist_id}", access_token)
+        params = {"fields": fields} if fields else None
+        return await self._api_request("GET", f"/playlists/{playlist_id}", access_token, params=params)
 
     async def get_playlist_tracks(
         self,
@@ -127,69 +222,140 @@ class SpotifyService:
         *,
         limit: int = 100,
         offset: int = 0,
+        fields: str | None = None,
     ) -> dict[str, Any]:
         access_token = await self._ensure_access_token(user)
         safe_limit = max(1, min(limit, 100))
         safe_offset = max(0, offset)
-        params = {"limit": safe_limit, "offset": safe_offset}
+        params: dict[str, Any] = {"limit": safe_limit, "offset": safe_offset}
+        if fields:
+            params["fields"] = fields
         return await self._api_request("GET", f"/playlists/{playlist_id}/tracks", access_token, params=params)
 
+    async def _add_playlist_chunk(
+        self, playlist_id: str, uris: list[str], user: User, *, snapshot_id: str | None
+    ) -> dict[str, Any]:
+        access_token = await self._ensure_access_token(user)
+        payload = {"uris": uris}
+        try:
+            return await self._api_request(
+                "POST",
+                f"/playlists/{playlist_id}/tracks",
+                access_token,
+                json=payload,
+            )
+        except HTTPException as exc:
+            if exc.status_code < 500:
+                raise
+            # A failed append may still have been applied. An unchanged snapshot_id proves it was not;
+            # a new one only counts as our append when the chunk is also the playlist's tail.
+            current = await self.get_playlist(playlist_id, user, fields="snapshot_id")
+            if (
+                snapshot_id is not None
+                and current.get("snapshot_id") != snapshot_id
+                and await self._playlist_ends_with(playlist_id, uris, user)
+            ):
+                return current
+            access_token = await self._ensure_access_token(user)
+            return await self._api_request(
+                "POST",
+                f"/playlists/{playlist_id}/tracks",
+                access_token,
+                json=payload,
+            )
+
+    async def _playlist_ends_with(self, playlist_id: str, uris: list[str], user: User) -> bool:
+        summary = await self.get_playlist_tracks(playlist_id, user, limit=1, fields="total")
+        total = summary.get("total") or 0
+        if total < len(uris):
+            return False
+        tail = await self.get_playlist_tracks(
+            playlist_id,
+            user,
+            limit=len(uris),
+            offset=total - len(uris),
+            fields="items(track(uri))",
+        )
+        tail_uris = [(item.get("track") or {}).get("uri") for item in tail.get("items") or []]
+        return tail_uris == uris
+
     async def get_app_access_token(self) -> str:
-        now = datetime.now(timezone.utc)
-        if self._app_token and self._app_token_expires_at and self._app_token_expires_at > now + timedelta(seconds=60):
-            return self._app_token
-
-        payload = await self._request_token({"grant_type": "client_credentials"})
-        access_token = payload.get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=500, detail="Spotify token request failed")
-        expires_in = payload.get("expires_in", 0)
-        self._app_token = access_token
-        self._app_token_expires_at = now + timedelta(seconds=expires_in)
-        return access_token
+        leeway = timedelta(seconds=self.settings.spotify_app_token_refresh_leeway)
+        cached = _app_token_cache.get(leeway=leeway)
+        if cached:
+            return cached
+
+        # Single-flight: concurrent callers wait for the one in-flight token request.
+        async with _app_token_cache.lock:
+            cached = _app_token_cache.get(leeway=leeway)
+            if cached:
+                return cached
+
+            payload = await self._request_token({"grant_type": "client_credentials"})
+            access_token = payload.get("access_token")
+            if not access_token:
+                raise HTTPException(status_code=500, detail="Spotify token request failed")
+            _app_token_cache.store(access_token, payload.get("expires_in", 0))
+            return access_token
 
     async def search_new_releases(self, *, limit: int = 50, offset: int = 0) -> dict[str, Any]:
-        access_token = await self.get_app_access_token()
         safe_limit = max(1, min(limit, 50))
         safe_offset = max(0, offset)
         params = {"q": "tag:new", "type": "album", "limit": safe_limit, "offset": safe_offset}
-        return await self._api_request("GET", "/search", access_token, params=params)
+        return await self._app_api_request("GET", "/search", params=params)
 
     async def get_album(self, album_id: str) -> dict[str, Any]:
-        access_token = await self.get_app_access_token()
-        return await self._api_request("GET", f"/albums/{album_id}", access_token)
+        return await self._app_api_request("GET", f"/albums/{album_id}")
+
+    async def get_albums(self, ids: list[str]) -> dict[str, Any]:
+        chunk = ",".join(ids[:20])
+        params = {"ids": chunk}
+        return await self._app_api_request("GET", "/albums", params=params)
 
     async def get_album_tracks(self, album_id: str, *, limit: int = 50, offset: int = 0) -> dict[str, Any]:
-        access_token = await self.get_app_access_token()
         safe_limit = max(1, min(limit, 50))
         safe_offset = max(0, offset)
         params = {"limit": safe_limit, "offset": safe_offset}
-        return await self._api_request("GET", f"/albums/{album_id}/tracks", access_token, params=params)
+        return await self._app_api_request("GET", f"/albums/{album_id}/tracks", params=params)
 
     async def get_tracks(self, ids: list[str]) -> dict[str, Any]:
-        access_token = await self.get_app_access_token()
         chunk = ",".join(ids[:50])
         params = {"ids": chunk}
-        return await self._api_request("GET", "/tracks", access_token, params=params)
+        return await self._app_api_request("GET", "/tracks", params=params)
 
     async def get_artists(self, ids: list[str]) -> dict[str, Any]:
-        access_token = await self.get_app_access_token()
         chunk = ",".join(ids[:50])
         params = {"ids": chunk}
-        return await self._api_request("GET", "/artists", access_token, params=params)
+        return await self._app_api_request("GET", "/artists", params=params)
 
     async def _ensure_access_token(self, user: User) -> str:
-        token = await self._get_user_token(user.id)
-        if token is None:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing Spotify tokens")
-
-        if token.expires_at <= datetime.now(timezone.utc) + timedelta(seconds=60):
-            refreshed = await self.refresh_access_token(token.refresh_token)
-            await self.upsert_user_tokens(user, refreshed)
-            token = await self._get_user_token(user.id)
+        leeway = timedelta(seconds=60)
+        cached = _user_token_cache.get(user.id, leeway=leeway)
+        if cached:
+            return cached
+
+        # Concurrent callers (e.g. a playlist page fan-out) often share one AsyncSession, which cannot run
+        # queries in parallel; one of them loads or refreshes the token and the rest pick it up from the cache.
+        async with _user_token_cache.lock(user.id):
+            cached = _user_token_cache.get(user.id, leeway=leeway)
+            if cached:
+                return cached
+
+            # Reuse the token relationship when the caller already loaded it (e.g. get_current_user).
+            token = user.token if "token" not in inspect(user).unloaded else None
             if token is None:
-                raise HTTPException(status_code=500, detail="Unable to refresh Spotify token")
-        return token.access_token
+                token = await self._get_user_token(user.id)
+            if token is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing Spotify tokens")
+
+            if token.expires_at <= datetime.now(timezone.utc) + leeway:
+                refreshed = await self.refresh_access_token(token.refresh_token)
+                await self.upsert_user_tokens(user, refreshed)
+                token = await self._get_user_token(user.id)
+                if token is None:
+                    raise HTTPException(status_code=500, detail="Unable to refresh Spotify token")
+            _user_token_cache.store(token)
+            return token.access_token
 
     async def _get_user_token(self, user_id: uuid.UUID) -> Token | None:
         stmt = select(Token).where(Token.user_id == user_id)
@@ -198,19 +364,31 @@ class SpotifyService:
 
     async def _request_token(self, data: dict[str, Any]) -> dict[str, Any]:
         auth = (self.settings.spotify_client_id, self.settings.spotify_client_secret)
-        async with httpx.AsyncClient(timeout=15) as client:
-            try:
-                response = await client.post(self.TOKEN_URL, data=data, auth=auth)
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                raise HTTPException(
-                    status_code=exc.response.status_code,
-                    detail=f"Spotify token request failed: {exc.response.text}",
-                ) from exc
-            except httpx.HTTPError as exc:  # pragma: no cover - network errors
-                raise HTTPException(status_code=502, detail="Unable to reach Spotify") from exc
+        try:
+            response = await self.client.post(self.TOKEN_URL, data=data, auth=auth)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            raise HTTPException(
+                status_code=exc.response.status_code,
+                detail=f"Spotify token request failed: {exc.response.text}",
+            ) from exc
+        except httpx.HTTPError as exc:  # pragma: no cover - network errors
+            raise HTTPException(status_code=502, detail="Unable to reach Spotify") from exc
         return response.json()
 
+    async def _app_api_request(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:
+        access_token = await self.get_app_access_token()
+        try:
+            return await self._api_request(method, path, access_token, **kwargs)
+        except HTTPException as exc:
+            if exc.status_code != status.HTTP_401_UNAUTHORIZED:
+                raise
+        # The shared token was revoked or rejected early; fetch a new one and retry once.
+        logger.info("Spotify rejected the app token for %s %s, refreshing it", method, path)
+        _app_token_cache.clear(access_token)
+        access_token = await self.get_app_access_token()
+        return await self._api_request(method, path, access_token, **kwargs)
+
     async def _api_request(
         self,
         method: str,
@@ -220,17 +398,58 @@ class SpotifyService:
     ) -> dict[str, Any]:
         url = f"{self.API_BASE_URL}{path}"
         headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-        async with httpx.AsyncClient(timeout=15) as client:
+        limiter = get_rate_limiter()
+        max_retries = max(0, self.settings.spotify_max_retries)
+        retry_idempotent = method.upper() in self.IDEMPOTENT_METHODS
+
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
             try:
-                response = await client.request(method, url, headers=headers, **kwargs)
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                detail = exc.response.json() if exc.response.headers.get("content-type", "").startswith("application/json") else exc.response.text
-                raise HTTPException(status_code=exc.response.status_code, detail=detail)
+                response = await self.client.request(method, url, headers=headers, **kwargs)
             except httpx.HTTPError as exc:  # pragma: no cover - network errors
+                if retry_idempotent and attempt < max_retries:
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                    continue
                 raise HTTPException(status_code=502, detail="Spotify API unavailable") from exc
+
+            if response.status_code == 429:
+                delay = self._parse_retry_after(response) or self._backoff_delay(attempt)
+                limiter.pause(delay)
+                if attempt < max_retries and delay <= self.settings.spotify_retry_max_delay:
+                    logger.info("Spotify rate limited %s %s, retrying in %.1fs", method, path, delay)
+                    await asyncio.sleep(delay)
+                    continue
+            elif response.status_code >= 500 and retry_idempotent and attempt < max_retries:
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+            break
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            detail = exc.response.json() if exc.response.headers.get("content-type", "").startswith("application/json") else exc.response.text
+            raise HTTPException(status_code=exc.response.status_code, detail=detail)
         return response.json()
 
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps retries from concurrent workers from lining up.
+        ceiling = min(self.settings.spotify_retry_max_delay, self.settings.spotify_retry_backoff * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _chunk(values: list[str], size: int) -> list[list[str]]:
+        return [values[start : start + size] for start in range(0, len(values), size)]
+
+    @staticmethod
+    def _parse_retry_after(response: httpx.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
     @staticmethod
     def build_authorize_url(state: str) -> str:
         settings = get_settings()
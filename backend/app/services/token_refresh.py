@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Token
+from app.services.spotify import SpotifyService, invalidate_user_token
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRefreshService:
+    """Refresh user OAuth tokens ahead of expiry so request paths rarely refresh inline."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.spotify = SpotifyService(session)
+
+    async def refresh_expiring(self, *, window_minutes: int = 15, concurrency: int = 5) -> int:
+        tokens = await self._get_expiring_tokens(window_minutes)
+        if not tokens:
+            return 0
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def refresh(token: Token) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    payload = await self.spotify.refresh_access_token(token.refresh_token)
+                except Exception as exc:  # pragma: no cover - background logging only
+                    logger.warning("Failed to refresh Spotify token for user %s: %s", token.user_id, exc)
+                    return None
+            return self._build_update(token, payload)
+
+        results = await asyncio.gather(*(refresh(token) for token in tokens))
+        refreshed = [(token, row) for token, row in zip(tokens, results) if row is not None]
+        if not refreshed:
+            return 0
+
+        # ORM bulk UPDATE by primary key: one executemany instead of a flush per token.
+        await self.session.execute(update(Token), [row for _, row in refreshed])
+        await self.session.commit()
+        for token, _ in refreshed:
+            invalidate_user_token(token.user_id)
+        return len(refreshed)
+
+    async def _get_expiring_tokens(self, window_minutes: int) -> list[Token]:
+        cutoff = datetime.now(timezone.utc) + timedelta(minutes=window_minutes)
+        stmt = select(Token).where(Token.expires_at <= cutoff)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _build_update(token: Token, payload: dict[str, Any]) -> dict[str, Any] | None:
+        access_token = payload.get("access_token")
+        if not access_token:
+            return None
+        now = datetime.now(timezone.utc)
+        return {
+            "id": token.id,
+            "access_token": access_token,
+            "refresh_token": payload.get("refresh_token") or token.refresh_token,
+            "scope": payload.get("scope", token.scope),
+            "token_type": payload.get("token_type", token.token_type),
+            "expires_at": now + timedelta(seconds=payload.get("expires_in", 0)),
+            "updated_at": now,
+        }
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 import logging
+import time
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import ARRAY, Integer, String, cast, column, exists, func, or_, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Artist, Track
+from app.core.config import get_settings
+from app.models import Artist, PlaylistTrack, Release, ReleaseTrack, Track, TrackArtist
 from app.services.spotify import SpotifyService
 
 logger = logging.getLogger(__name__)
@@ -52,32 +57,7 @@ class TrackArtistDetailsSyncService:
         if not ids:
             return 0
 
-        payload = await self.spotify.get_tracks(ids)
-        items = payload.get("tracks") or []
-        parsed = self._parse_tracks(items)
-        if not parsed:
-            return 0
-
-        stmt_existing = select(Track).where(Track.id.in_([track.id for track in parsed]))
-        result_existing = await self.session.execute(stmt_existing)
-        existing_map = {track.id: track for track in result_existing.scalars().all()}
-
-        updated = 0
-        for track in parsed:
-            existing = existing_map.get(track.id)
-            if not existing:
-                continue
-            existing.name = track.name or existing.name
-            existing.duration_ms = track.duration_ms if track.duration_ms is not None else existing.duration_ms
-            existing.track_number = track.track_number if track.track_number is not None else existing.track_number
-            existing.type = track.type or existing.type
-            if existing.popularity != track.popularity:
-                existing.popularity = track.popularity
-            updated += 1
-
-        if updated:
-            await self.session.commit()
-        return updated
+        return await self._apply_tracks(await self._fetch_tracks(ids))
 
     async def sync_artists(self, *, batch_size: int = 50) -> int:
         stmt = select(Artist.id).where(Artist.popularity.is_(None)).limit(batch_size)
@@ -86,33 +66,258 @@ class TrackArtistDetailsSyncService:
         if not ids:
             return 0
 
-        payload = await self.spotify.get_artists(ids)
-        items = payload.get("artists") or []
-        parsed = self._parse_artists(items)
-        if not parsed:
+        return await self._apply_artists(await self._fetch_artists(ids))
+
+    async def sync_track_ids(self, ids: list[str]) -> int:
+        """Fetch popularity for the given tracks that are still missing it."""
+        return await self._sync_missing(Track, ids, self._fetch_tracks, self._apply_tracks)
+
+    async def sync_artist_ids(self, ids: list[str]) -> int:
+        """Fetch popularity for the given artists that are still missing it."""
+        return await self._sync_missing(Artist, ids, self._fetch_artists, self._apply_artists)
+
+    async def _sync_missing(
+        self,
+        model: type[Track] | type[Artist],
+        ids: list[str],
+        fetch: Callable[[list[str]], Awaitable[list[Any]]],
+        apply: Callable[[list[Any]], Awaitable[int]],
+    ) -> int:
+        if not ids:
+            return 0
+        stmt = select(model.id).where(model.id.in_(ids)).where(model.popularity.is_(None))
+        missing = (await self.session.execute(stmt)).scalars().all()
+        if not missing:
             return 0
+        return await self._fetch_and_apply(model, missing, fetch, apply, batch_size=50)
 
-        stmt_existing = select(Artist).where(Artist.id.in_([artist.id for artist in parsed]))
-        result_existing = await self.session.execute(stmt_existing)
-        existing_map = {artist.id: artist for artist in result_existing.scalars().all()}
+    async def drain_tracks(self, *, batch_size: int = 50, concurrency: int = 4, time_budget: float = 300) -> int:
+        """Keep syncing batches of tracks missing popularity until none are left or the budget runs out."""
+        return await self._drain(
+            Track,
+            self._fetch_tracks,
+            self._apply_tracks,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            time_budget=time_budget,
+        )
 
+    async def drain_artists(self, *, batch_size: int = 50, concurrency: int = 4, time_budget: float = 300) -> int:
+        """Keep syncing batches of artists missing popularity until none are left or the budget runs out."""
+        return await self._drain(
+            Artist,
+            self._fetch_artists,
+            self._apply_artists,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            time_budget=time_budget,
+        )
+
+    async def _drain(
+        self,
+        model: type[Track] | type[Artist],
+        fetch: Callable[[list[str]], Awaitable[list[Any]]],
+        apply: Callable[[list[Any]], Awaitable[int]],
+        *,
+        batch_size: int,
+        concurrency: int,
+        time_budget: float,
+    ) -> int:
+        deadline = time.monotonic() + time_budget
+        batch_size = max(1, min(batch_size, 50))
+        workers = max(1, concurrency)
+        # Walk ids in order so rows Spotify cannot fill (null popularity, unknown ids) are not re-fetched forever.
+        last_id: str | None = None
         updated = 0
-        for artist in parsed:
-            existing = existing_map.get(artist.id)
-            if not existing:
+        while time.monotonic() < deadline:
+            stmt = select(model.id).where(model.popularity.is_(None)).order_by(model.id).limit(batch_size * workers)
+            if last_id is not None:
+                stmt = stmt.where(model.id > last_id)
+            ids = (await self.session.execute(stmt)).scalars().all()
+            if not ids:
+                break
+            last_id = ids[-1]
+            updated += await self._fetch_and_apply(model, ids, fetch, apply, batch_size=batch_size)
+        return updated
+
+    async def refresh_stale_tracks(self, *, max_requests: int, concurrency: int = 4) -> int:
+        """Re-fetch popularity for the most overdue tracks, spending at most ``max_requests`` API calls."""
+        hot = or_(
+            exists().where(PlaylistTrack.track_id == Track.id),
+            exists()
+            .where(ReleaseTrack.track_id == Track.id)
+            .where(ReleaseTrack.release_id == Release.id)
+            .where(Release.release_date >= self._new_release_cutoff()),
+        )
+        return await self._refresh_stale(
+            Track, hot, self._fetch_tracks, self._apply_tracks, max_requests=max_requests, concurrency=concurrency
+        )
+
+    async def refresh_stale_artists(self, *, max_requests: int, concurrency: int = 4) -> int:
+        """Re-fetch popularity for the most overdue artists, spending at most ``max_requests`` API calls."""
+        hot_track = or_(
+            exists().where(PlaylistTrack.track_id == TrackArtist.track_id),
+            exists()
+            .where(ReleaseTrack.track_id == TrackArtist.track_id)
+            .where(ReleaseTrack.release_id == Release.id)
+            .where(Release.release_date >= self._new_release_cutoff()),
+        )
+        hot = exists().where(TrackArtist.artist_id == Artist.id).where(hot_track)
+        return await self._refresh_stale(
+            Artist, hot, self._fetch_artists, self._apply_artists, max_requests=max_requests, concurrency=concurrency
+        )
+
+    async def _refresh_stale(
+        self,
+        model: type[Track] | type[Artist],
+        hot: Any,
+        fetch: Callable[[list[str]], Awaitable[list[Any]]],
+        apply: Callable[[list[Any]], Awaitable[int]],
+        *,
+        max_requests: int,
+        concurrency: int,
+    ) -> int:
+        if max_requests <= 0:
+            return 0
+
+        settings = get_settings()
+        now = datetime.now(timezone.utc)
+        hot_cutoff = now - timedelta(hours=settings.popularity_hot_refresh_hours)
+        tail_cutoff = now - timedelta(days=settings.popularity_tail_refresh_days)
+        limit = max_requests * 50
+        # Two plain range scans on ix_<table>_popularity_updated_at rather than one CASE-based filter and
+        # sort, which Postgres can only answer by scanning the whole catalog. Rows still missing
+        # popularity belong to the drain jobs, and the < cutoff predicates already exclude NULLs.
+        hot_stmt = (
+            select(model.id)
+            .where(model.popularity_updated_at < hot_cutoff)
+            .where(hot)
+            .order_by(model.popularity_updated_at)
+            .limit(limit)
+        )
+        tail_stmt = (
+            select(model.id)
+            .where(model.popularity_updated_at < tail_cutoff)
+            .order_by(model.popularity_updated_at)
+            .limit(limit)
+        )
+        hot_ids = (await self.session.execute(hot_stmt)).scalars().all()
+        tail_ids = (await self.session.execute(tail_stmt)).scalars().all()
+        # Hot rows go first; dict.fromkeys drops tail rows that were already picked as hot.
+        ids = list(dict.fromkeys([*hot_ids, *tail_ids]))[:limit]
+        if not ids:
+            return 0
+
+        updated = 0
+        step = 50 * max(1, concurrency)
+        for start in range(0, len(ids), step):
+            updated += await self._fetch_and_apply(model, ids[start : start + step], fetch, apply, batch_size=50)
+        return updated
+
+    async def _fetch_and_apply(
+        self,
+        model: type[Track] | type[Artist],
+        ids: list[str],
+        fetch: Callable[[list[str]], Awaitable[list[Any]]],
+        apply: Callable[[list[Any]], Awaitable[int]],
+        *,
+        batch_size: int,
+    ) -> int:
+        batches = [ids[start : start + batch_size] for start in range(0, len(ids), batch_size)]
+        results = await asyncio.gather(*(fetch(batch) for batch in batches), return_exceptions=True)
+        updated = 0
+        for batch, parsed in zip(batches, results):
+            if isinstance(parsed, Exception):
+                logger.warning("Failed to fetch %s details for %d ids: %s", model.__tablename__, len(batch), parsed)
                 continue
-            existing.name = artist.name or existing.name
-            existing.type = artist.type or existing.type
-            if existing.popularity != artist.popularity:
-                existing.popularity = artist.popularity
-            existing.followers = artist.followers if artist.followers is not None else existing.followers
-            existing.genres = artist.genres or existing.genres
-            updated += 1
-
-        if updated:
-            await self.session.commit()
+            updated += await apply(parsed)
         return updated
 
+    @staticmethod
+    def _new_release_cutoff() -> date:
+        return date.today() - timedelta(days=get_settings().popularity_new_release_days)
+
+    async def _fetch_tracks(self, ids: list[str]) -> list[_ParsedTrack]:
+        payload = await self.spotify.get_tracks(ids)
+        return self._parse_tracks(payload.get("tracks") or [])
+
+    async def _fetch_artists(self, ids: list[str]) -> list[_ParsedArtist]:
+        payload = await self.spotify.get_artists(ids)
+        return self._parse_artists(payload.get("artists") or [])
+
+    async def _apply_tracks(self, parsed: list[_ParsedTrack]) -> int:
+        if not parsed:
+            return 0
+
+        rows = values(
+            column("id", String),
+            column("name", String),
+            column("duration_ms", Integer),
+            column("track_number", Integer),
+            column("type", String),
+            column("popularity", Integer),
+            name="parsed",
+        ).data(
+            [
+                (track.id, track.name, track.duration_ms, track.track_number, track.type, track.popularity)
+                for track in parsed
+            ]
+        )
+        # Casts keep all-NULL VALUES columns from resolving to text.
+        stmt = (
+            update(Track)
+            .where(Track.id == rows.c.id)
+            .values(
+                name=func.coalesce(func.nullif(cast(rows.c.name, String), ""), Track.name),
+                duration_ms=func.coalesce(cast(rows.c.duration_ms, Integer), Track.duration_ms),
+                track_number=func.coalesce(cast(rows.c.track_number, Integer), Track.track_number),
+                type=func.coalesce(func.nullif(cast(rows.c.type, String), ""), Track.type),
+                popularity=cast(rows.c.popularity, Integer),
+                popularity_updated_at=func.now(),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount or 0
+
+    async def _apply_artists(self, parsed: list[_ParsedArtist]) -> int:
+        if not parsed:
+            return 0
+
+        rows = values(
+            column("id", String),
+            column("name", String),
+            column("type", String),
+            column("popularity", Integer),
+            column("followers", Integer),
+            column("genres", ARRAY(String)),
+            name="parsed",
+        ).data(
+            [
+                (artist.id, artist.name, artist.type, artist.popularity, artist.followers, artist.genres or None)
+                for artist in parsed
+            ]
+        )
+        stmt = (
+            update(Artist)
+            .where(Artist.id == rows.c.id)
+            .values(
+                name=func.coalesce(func.nullif(cast(rows.c.name, String), ""), Artist.name),
+                type=func.coalesce(func.nullif(cast(rows.c.type, String), ""), Artist.type),
+                popularity=cast(rows.c.popularity, Integer),
+                popularity_updated_at=func.now(),
+                followers=func.coalesce(cast(rows.c.followers, Integer), Artist.followers),
+                genres=func.coalesce(cast(rows.c.genres, ARRAY(String)), Artist.genres),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount or 0
+
     def _parse_tracks(self, items: list[dict[str, Any]]) -> list[_ParsedTrack]:
         parsed = []
         for item in items:
@@ -1,7 +1,21 @@
-from app.tasks.new_releases import sync_new_releases
-from app.tasks.release_details import sync_recent_release_details
-from app.tasks.recent_tracks import sync_recent_tracks_for_all_users
-from app.tasks.track_artist_details import sync_artist_details, sync_track_details
+from app.tasks.new_releases import NEW_RELEASES_SYNC_INTERVAL_MINUTES, sync_new_releases
+from app.tasks.pipeline import get_ingestion_pipeline, start_ingestion_pipeline, stop_ingestion_pipeline
+from app.tasks.release_details import RELEASE_DETAILS_SYNC_INTERVAL_MINUTES, sync_recent_release_details
+from app.tasks.recent_tracks import (
+    RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES,
+    RECENT_TRACKS_SYNC_INTERVAL_MINUTES,
+    compact_recent_track_payloads,
+    sync_recent_tracks_for_all_users,
+)
+from app.tasks.token_refresh import TOKEN_REFRESH_INTERVAL_MINUTES, refresh_expiring_tokens
+from app.tasks.track_artist_details import (
+    ARTIST_DETAILS_SYNC_INTERVAL_MINUTES,
+    POPULARITY_REFRESH_INTERVAL_MINUTES,
+    TRACK_DETAILS_SYNC_INTERVAL_MINUTES,
+    refresh_stale_popularity,
+    sync_artist_details,
+    sync_track_details,
+)
 
 __all__ = [
     "sync_recent_tracks_for_all_users",
@@ -9,4 +23,18 @@ __all__ = [
     "sync_recent_release_details",
     "sync_track_details",
     "sync_artist_details",
+    "refresh_expiring_tokens",
+    "compact_recent_track_payloads",
+    "refresh_stale_popularity",
+    "RECENT_TRACKS_SYNC_INTERVAL_MINUTES",
+    "RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES",
+    "NEW_RELEASES_SYNC_INTERVAL_MINUTES",
+    "RELEASE_DETAILS_SYNC_INTERVAL_MINUTES",
+    "TRACK_DETAILS_SYNC_INTERVAL_MINUTES",
+    "ARTIST_DETAILS_SYNC_INTERVAL_MINUTES",
+    "TOKEN_REFRESH_INTERVAL_MINUTES",
+    "POPULARITY_REFRESH_INTERVAL_MINUTES",
+    "get_ingestion_pipeline",
+    "start_ingestion_pipeline",
+    "stop_ingestion_pipeline",
 ]
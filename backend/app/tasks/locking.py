@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+import functools
+import logging
+from typing import ParamSpec, TypeVar
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.session import AsyncSessionLocal
+from app.models import JobLease
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Replicas tick at slightly different moments; accept a run this close to the interval as due.
+_INTERVAL_TOLERANCE = 0.9
+
+
+def exclusive_job(*, minutes: float) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R | None]]]:
+    """Run the job at most once per ``minutes`` across all instances, claimed through a ``job_leases`` row.
+
+    ``minutes`` must be the interval the job is scheduled with, so pass the same constant to both.
+    Every replica schedules the job on its own interval trigger; the first tick that finds the
+    last run at least ``minutes`` old (and no unexpired lease) claims the row and runs, the rest
+    skip. The lease only pins a row, not a connection, and lasts one interval, so a holder that
+    crashes without releasing it costs the job a single cycle.
+    """
+    due_after = timedelta(minutes=minutes * _INTERVAL_TOLERANCE)
+    lease = timedelta(minutes=minutes)
+
+    def decorator(job: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R | None]]:
+        lease_name = f"{job.__module__}.{job.__name__}"
+
+        @functools.wraps(job)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R | None:
+            if not await _claim(lease_name, due_after, lease):
+                logger.info("Skipping %s: already run or running in another instance", job.__name__)
+                return None
+            try:
+                return await job(*args, **kwargs)
+            finally:
+                await _release(lease_name)
+
+        return wrapper
+
+    return decorator
+
+
+async def _claim(name: str, due_after: timedelta, lease: timedelta) -> bool:
+    now = func.now()
+    stmt = insert(JobLease).values(name=name, last_started_at=now, locked_until=now + lease)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[JobLease.name],
+        set_={
+            "last_started_at": stmt.excluded.last_started_at,
+            "locked_until": stmt.excluded.locked_until,
+        },
+        where=or_(JobLease.locked_until.is_(None), JobLease.locked_until < now)
+        & (JobLease.last_started_at <= now - due_after),
+    ).returning(JobLease.name)
+    async with AsyncSessionLocal() as session:
+        claimed = await session.scalar(stmt)
+        await session.commit()
+    return claimed is not None
+
+
+async def _release(name: str) -> None:
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(JobLease).where(JobLease.name == name).values(locked_until=None))
+            await session.commit()
+    except Exception as exc:  # pragma: no cover - the lease expires on its own
+        logger.warning("Failed to release job lease %s: %s", name, exc)
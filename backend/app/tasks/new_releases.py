@@ -4,15 +4,23 @@ import logging
 
 from app.db.session import AsyncSessionLocal
 from app.services.new_releases import NewReleasesSyncService
+from app.tasks.locking import exclusive_job
+from app.tasks.pipeline import get_ingestion_pipeline
 
 logger = logging.getLogger(__name__)
 
+NEW_RELEASES_SYNC_INTERVAL_MINUTES = 15
 
+
+@exclusive_job(minutes=NEW_RELEASES_SYNC_INTERVAL_MINUTES)
 async def sync_new_releases() -> None:
     async with AsyncSessionLocal() as session:
         service = NewReleasesSyncService(session)
         try:
             created = await service.sync()
             logger.info("Synced %d new releases", created)
+            pipeline = get_ingestion_pipeline()
+            if pipeline is not None:
+                pipeline.publish_releases(service.created_ids)
         except Exception as exc:  # pragma: no cover - background logging only
             logger.warning("Failed to sync new releases: %s", exc)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+import logging
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.services.release_details import ReleaseDetailsSyncService
+from app.services.track_artist_details import TrackArtistDetailsSyncService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionPipeline:
+    """In-process stages linking new releases -> album details -> track/artist popularity.
+
+    Publishing never blocks: when a queue is full the ids are dropped and the
+    interval jobs pick them up on their next run.
+    """
+
+    def __init__(self, *, queue_size: int, batch_wait: float):
+        self.batch_wait = batch_wait
+        self.releases: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.tracks: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.artists: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._run_stage("release details", self.releases, 20, self._sync_release_details)),
+            asyncio.create_task(self._run_stage("track popularity", self.tracks, 50, self._sync_track_popularity)),
+            asyncio.create_task(self._run_stage("artist popularity", self.artists, 50, self._sync_artist_popularity)),
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def publish_releases(self, ids: Iterable[str]) -> None:
+        self._offer(self.releases, ids, "release")
+
+    def publish_tracks(self, ids: Iterable[str]) -> None:
+        self._offer(self.tracks, ids, "track")
+
+    def publish_artists(self, ids: Iterable[str]) -> None:
+        self._offer(self.artists, ids, "artist")
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue[str], ids: Iterable[str], kind: str) -> None:
+        dropped = 0
+        for item in ids:
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                dropped += 1
+        if dropped:
+            logger.info("Ingestion queue full, left %d %s ids for the interval jobs", dropped, kind)
+
+    async def _run_stage(
+        self,
+        name: str,
+        queue: asyncio.Queue[str],
+        batch_size: int,
+        handle: Callable[[list[str]], Awaitable[None]],
+    ) -> None:
+        while True:
+            batch = await self._next_batch(queue, batch_size)
+            try:
+                await handle(batch)
+            except Exception as exc:  # pragma: no cover - background logging only
+                logger.warning("Ingestion stage %s failed for %d ids: %s", name, len(batch), exc)
+
+    async def _next_batch(self, queue: asyncio.Queue[str], batch_size: int) -> list[str]:
+        # Wait for one id, then give the producer a short window to fill the batch.
+        batch = {await queue.get()}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.add(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return list(batch)
+
+    async def _sync_release_details(self, ids: list[str]) -> None:
+        async with AsyncSessionLocal() as session:
+            service = ReleaseDetailsSyncService(session)
+            synced = await service.sync_releases(ids)
+        logger.info("Pipeline synced details for %d releases", synced)
+        self.publish_tracks(service.discovered_track_ids)
+        self.publish_artists(service.discovered_artist_ids)
+
+    async def _sync_track_popularity(self, ids: list[str]) -> None:
+        async with AsyncSessionLocal() as session:
+            updated = await TrackArtistDetailsSyncService(session).sync_track_ids(ids)
+        logger.info("Pipeline synced popularity for %d tracks", updated)
+
+    async def _sync_artist_popularity(self, ids: list[str]) -> None:
+        async with AsyncSessionLocal() as session:
+            updated = await TrackArtistDetailsSyncService(session).sync_artist_ids(ids)
+        logger.info("Pipeline synced popularity for %d artists", updated)
+
+
+_pipeline: IngestionPipeline | None = None
+
+
+def get_ingestion_pipeline() -> IngestionPipeline | None:
+    """Return the running pipeline, or None when it is disabled or not started."""
+    return _pipeline
+
+
+def start_ingestion_pipeline() -> IngestionPipeline | None:
+    global _pipeline
+    settings = get_settings()
+    if not settings.ingestion_pipeline_enabled:
+        return None
+    if _pipeline is None:
+        _pipeline = IngestionPipeline(
+            queue_size=settings.ingestion_queue_size,
+            batch_wait=settings.ingestion_batch_wait_seconds,
+        )
+        _pipeline.start()
+    return _pipeline
+
+
+async def stop_ingestion_pipeline() -> None:
+    global _pipeline
+    if _pipeline is not None:
+        await _pipeline.stop()
+    _pipeline = None
@@ -1,29 +1,85 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
 import logging
+import uuid
 
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
+from app.core.config import get_settings
 from app.db.session import AsyncSessionLocal
 from app.models import User
 from app.services.recent_tracks import RecentTracksSyncService
+from app.tasks.locking import exclusive_job
 
 logger = logging.getLogger(__name__)
 
+RECENT_TRACKS_SYNC_INTERVAL_MINUTES = 5
+RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES = 60
 
-async def sync_recent_tracks_for_all_users() -> None:
+
+@dataclass(slots=True)
+class RecentTracksSyncStats:
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    inserted: int = 0
+
+
+@exclusive_job(minutes=RECENT_TRACKS_SYNC_INTERVAL_MINUTES)
+async def sync_recent_tracks_for_all_users() -> RecentTracksSyncStats:
+    stats = RecentTracksSyncStats()
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(User))
-        users = result.scalars().all()
-        if not users:
-            logger.info("No users found for recent track sync")
-            return
-
-        logger.info("Starting recent track sync for %d users", len(users))
-        sync_service = RecentTracksSyncService(session)
-        for user in users:
+        result = await session.execute(select(User.id))
+        user_ids = result.scalars().all()
+    if not user_ids:
+        logger.info("No users found for recent track sync")
+        return stats
+
+    concurrency = max(1, get_settings().recent_tracks_concurrency)
+    logger.info("Starting recent track sync for %d users (concurrency=%d)", len(user_ids), concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_user(user_id: uuid.UUID) -> None:
+        async with semaphore:
+            # Each user gets its own session so a failed commit cannot poison the others. The try spans
+            # the whole session block so that loading the user or closing the session counts as this
+            # user's failure instead of failing the gather; stats are only counted once it has exited.
+            inserted: int | None = None
             try:
-                await sync_service.sync(user)
-                logger.info("Synced recent tracks for user %s", user.id)
+                async with AsyncSessionLocal() as session:
+                    user = await session.get(User, user_id, options=[selectinload(User.token)])
+                    if user is not None and user.token is not None:
+                        inserted = await RecentTracksSyncService(session).sync_new_plays(user)
             except Exception as exc:  # pragma: no cover - background logging only
-                logger.warning("Failed to sync recent tracks for user %s: %s", user.id, exc)
+                stats.failed += 1
+                logger.warning("Failed to sync recent tracks for user %s: %s", user_id, exc)
+                return
+            if inserted is None:
+                stats.skipped += 1
+                return
+            stats.succeeded += 1
+            stats.inserted += inserted
+
+    await asyncio.gather(*(sync_user(user_id) for user_id in user_ids))
+    logger.info(
+        "Recent track sync finished: succeeded=%d failed=%d skipped=%d inserted=%d",
+        stats.succeeded,
+        stats.failed,
+        stats.skipped,
+        stats.inserted,
+    )
+    return stats
+
+
+@exclusive_job(minutes=RECENT_TRACKS_COMPACTION_INTERVAL_MINUTES)
+async def compact_recent_track_payloads() -> None:
+    async with AsyncSessionLocal() as session:
+        service = RecentTracksSyncService(session)
+        try:
+            compacted = await service.compact_stored_payloads()
+            logger.info("Compacted %d stored recent track payloads", compacted)
+        except Exception as exc:  # pragma: no cover - background logging only
+            logger.warning("Failed to compact recent track payloads: %s", exc)
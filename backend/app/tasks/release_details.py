@@ -4,15 +4,24 @@ import logging
 
 from app.db.session import AsyncSessionLocal
 from app.services.release_details import ReleaseDetailsSyncService
+from app.tasks.locking import exclusive_job
+from app.tasks.pipeline import get_ingestion_pipeline
 
 logger = logging.getLogger(__name__)
 
+RELEASE_DETAILS_SYNC_INTERVAL_MINUTES = 10
 
+
+@exclusive_job(minutes=RELEASE_DETAILS_SYNC_INTERVAL_MINUTES)
 async def sync_recent_release_details() -> None:
     async with AsyncSessionLocal() as session:
         service = ReleaseDetailsSyncService(session)
         try:
             synced = await service.sync_recent_releases()
             logger.info("Synced details for %d releases", synced)
+            pipeline = get_ingestion_pipeline()
+            if pipeline is not None:
+                pipeline.publish_tracks(service.discovered_track_ids)
+                pipeline.publish_artists(service.discovered_artist_ids)
         except Exception as exc:  # pragma: no cover - background logging only
             logger.warning("Failed to sync release details: %s", exc)
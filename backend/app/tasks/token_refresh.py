@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import logging
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.services.token_refresh import TokenRefreshService
+from app.tasks.locking import exclusive_job
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REFRESH_INTERVAL_MINUTES = 5
+
+
+@exclusive_job(minutes=TOKEN_REFRESH_INTERVAL_MINUTES)
+async def refresh_expiring_tokens() -> None:
+    settings = get_settings()
+    async with AsyncSessionLocal() as session:
+        service = TokenRefreshService(session)
+        try:
+            refreshed = await service.refresh_expiring(
+                window_minutes=settings.token_refresh_window_minutes,
+                concurrency=settings.token_refresh_concurrency,
+            )
+            logger.info("Refreshed %d expiring Spotify tokens", refreshed)
+        except Exception as exc:  # pragma: no cover - background logging only
+            logger.warning("Failed to refresh expiring Spotify tokens: %s", exc)
@@ -1,28 +1,67 @@
 from __future__ import annotations
 
 import logging
+import math
 
+from app.core.config import get_settings
 from app.db.session import AsyncSessionLocal
 from app.services.track_artist_details import TrackArtistDetailsSyncService
+from app.tasks.locking import exclusive_job
 
 logger = logging.getLogger(__name__)
 
+TRACK_DETAILS_SYNC_INTERVAL_MINUTES = 6
+ARTIST_DETAILS_SYNC_INTERVAL_MINUTES = 12
+POPULARITY_REFRESH_INTERVAL_MINUTES = 30
 
+
+@exclusive_job(minutes=TRACK_DETAILS_SYNC_INTERVAL_MINUTES)
 async def sync_track_details() -> None:
+    settings = get_settings()
     async with AsyncSessionLocal() as session:
         service = TrackArtistDetailsSyncService(session)
         try:
-            tracks_updated = await service.sync_tracks()
+            tracks_updated = await service.drain_tracks(
+                concurrency=settings.popularity_drain_concurrency,
+                time_budget=settings.popularity_drain_seconds,
+            )
             logger.info("Synced popularity for %d tracks", tracks_updated)
         except Exception as exc:  # pragma: no cover - background logging only
             logger.warning("Failed to sync track details: %s", exc)
 
 
+@exclusive_job(minutes=ARTIST_DETAILS_SYNC_INTERVAL_MINUTES)
 async def sync_artist_details() -> None:
+    settings = get_settings()
     async with AsyncSessionLocal() as session:
         service = TrackArtistDetailsSyncService(session)
         try:
-            artists_updated = await service.sync_artists()
+            artists_updated = await service.drain_artists(
+                concurrency=settings.popularity_drain_concurrency,
+                time_budget=settings.popularity_drain_seconds,
+            )
             logger.info("Synced popularity for %d artists", artists_updated)
         except Exception as exc:  # pragma: no cover - background logging only
             logger.warning("Failed to sync artist details: %s", exc)
+
+
+@exclusive_job(minutes=POPULARITY_REFRESH_INTERVAL_MINUTES)
+async def refresh_stale_popularity() -> None:
+    settings = get_settings()
+    # Spread the daily budget over the runs in a day and split it evenly between tracks and artists.
+    runs_per_day = 24 * 60 / POPULARITY_REFRESH_INTERVAL_MINUTES
+    per_run = math.ceil(settings.popularity_refresh_daily_requests / runs_per_day)
+    async with AsyncSessionLocal() as session:
+        service = TrackArtistDetailsSyncService(session)
+        try:
+            tracks_refreshed = await service.refresh_stale_tracks(
+                max_requests=math.ceil(per_run / 2),
+                concurrency=settings.popularity_drain_concurrency,
+            )
+            artists_refreshed = await service.refresh_stale_artists(
+                max_requests=per_run // 2,
+                concurrency=settings.popularity_drain_concurrency,
+            )
+            logger.info("Refreshed popularity for %d tracks and %d artists", tracks_refreshed, artists_refreshed)
+        except Exception as exc:  # pragma: no cover - background logging only
+            logger.warning("Failed to refresh stale popularity: %s", exc)